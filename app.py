@@ -1,22 +1,73 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, request, jsonify, render_template
 from flask_cors import CORS, cross_origin
 import sys
 import os
+from concurrent.futures import Future
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from src.cnnClassifier.utils.common import decodeImage
+from src.cnnClassifier.config.configuration import ConfigurationManager, find_config_files
 from src.cnnClassifier.pipeline.prediction import PredictionPipeline
+from src.cnnClassifier.pipeline.model_registry import get_model_registry
+from src.cnnClassifier.pipeline.micro_batcher import MicroBatcher
+from src.cnnClassifier.pipeline.result_cache import ResultCache
+from src.cnnClassifier.pipeline.training_jobs import TrainingJobManager
+# Same module path prediction.py records into; a src.cnnClassifier import would be a separate copy
+from cnnClassifier.pipeline.serving_metrics import REGISTRY, REQUEST_SECONDS
 
 os.putenv('LANG', 'en_US.UTF-8')
 os.putenv('LC_ALL', 'en_US.UTF-8')
 
 app = Flask(__name__)
 CORS(app)
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Job state lives on disk so every pre-fork worker sees the same job
+trainingJobs = TrainingJobManager(cwd=ROOT_DIR, state_dir=os.path.join(ROOT_DIR, "artifacts", "training_jobs"))
+clApp = None
 
 
 class ClientApp:
-    def __init__(self):
-        self.filename = "inputImage.jpg"
-        self.classifier = PredictionPipeline(self.filename)
+    def __init__(self, classifier=None):
+        serving_config = ConfigurationManager(*find_config_files(ROOT_DIR)).get_serving_config()
+        self.classifier = classifier or PredictionPipeline(
+            registry=get_model_registry(serving_config.model_path),
+            cache=ResultCache(serving_config.result_cache_size, serving_config.result_cache_ttl_s)
+            if serving_config.result_cache_size else None
+        )
+        # Load the model once at startup so /predict serves at steady-state latency
+        self.classifier.warm_up()
+        # Concurrent /predict and /predict/batch images share one model.predict call
+        self.batcher = MicroBatcher(
+            self.classifier.predict_batch,
+            max_batch_size=serving_config.max_batch_size,
+            max_wait_ms=serving_config.max_wait_ms
+        )
+
+    def submit(self, image_bytes: bytes) -> Future:
+        """Future of the prediction for one image: the cached result, or a micro-batched run whose result is cached"""
+        key, result = self.classifier.cached(image_bytes)
+        if result is not None:
+            future = Future()
+            future.set_result(result)
+            return future
+
+        def remember(done: Future):
+            if done.exception() is None:
+                self.classifier.remember(key, done.result())
+
+        future = self.batcher.submit(self.classifier.load_image(image_bytes))
+        future.add_done_callback(remember)
+        return future
+
+
+def preload_model():
+    """Load the serving model in a pre-fork parent so workers share it copy-on-write"""
+    serving_config = ConfigurationManager(*find_config_files(ROOT_DIR)).get_serving_config()
+    get_model_registry(serving_config.model_path).preload()
+
+
+def init_worker():
+    """Per-process setup; threads (micro-batcher, training jobs) must start after fork"""
+    global clApp
+    clApp = ClientApp()
 
 
 @app.route("/", methods=['GET'])
@@ -28,21 +79,74 @@ def home():
 @app.route("/train", methods=['GET','POST'])
 @cross_origin()
 def trainRoute():
-    os.system("python main.py")
-    # os.system("dvc repro")
-    return "Training done successfully!"
+    # Runs main.py in a background subprocess; repeated calls join the active job
+    job, created = trainingJobs.submit()
+    return jsonify({
+        "job_id": job.job_id,
+        "status": job.status,
+        "created": created,
+        "status_url": f"/train/{job.job_id}"
+    }), 202
+
+
+@app.route("/train/<job_id>", methods=['GET'])
+@cross_origin()
+def trainStatusRoute(job_id):
+    job = trainingJobs.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown training job: {job_id}"}), 404
+    return jsonify(job)
+
+
+@app.route("/predict/cache", methods=['GET'])
+@cross_origin()
+def predictCacheRoute():
+    cache = clApp.classifier.cache
+    return jsonify(cache.stats() if cache is not None else {"enabled": False})
 
 
 @app.route("/predict", methods=['POST'])
 @cross_origin()
 def predictRoute():
     image = request.json['image']
-    decodeImage(image, clApp.filename)
-    result = clApp.classifier.predict()
+    with REQUEST_SECONDS.time(route="/predict"):
+        try:
+            result = [clApp.submit(clApp.classifier.decode(image)).result()]
+        except Exception as e:
+            result = [{"error": str(e)}]
     return jsonify(result)
 
 
+@app.route("/predict/batch", methods=['POST'])
+@cross_origin()
+def predictBatchRoute():
+    images = request.json['images']
+    with REQUEST_SECONDS.time(route="/predict/batch"):
+        futures = []
+        for image in images:
+            try:
+                futures.append(clApp.submit(clApp.classifier.decode(image)))
+            except Exception as e:
+                futures.append(e)
+
+        results = []
+        for future in futures:
+            try:
+                if isinstance(future, Exception):
+                    raise future
+                results.append(future.result())
+            except Exception as e:
+                results.append({"error": str(e)})
+    return jsonify(results)
+
+
+@app.route("/metrics", methods=['GET'])
+def metricsRoute():
+    # Per process: under gunicorn each scrape reports the worker that answered
+    return Response(REGISTRY.render(), mimetype=REGISTRY.CONTENT_TYPE)
+
+
 if __name__ == "__main__":
-    clApp = ClientApp()
+    init_worker()
 
     app.run(host='0.0.0.0', port=8080) #for AWS
\ No newline at end of file
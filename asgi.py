@@ -0,0 +1,146 @@
+"""Async prediction API with bounded concurrency, served alongside the Flask app
+
+    uvicorn asgi:app --host 0.0.0.0 --port 8081
+
+Same /predict and /predict/batch request and response bodies as app.py. When
+more than serving.max_in_flight images are in flight the request is refused
+with 503 and Retry-After, and a request still waiting after
+serving.request_timeout_s gets 504. A batch larger than serving.max_in_flight
+could never be admitted and gets 413.
+"""
+import os
+import sys
+import json
+import asyncio
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from src.cnnClassifier.config.configuration import ConfigurationManager, find_config_files
+from src.cnnClassifier.pipeline.prediction import PredictionPipeline
+from src.cnnClassifier.pipeline.model_registry import get_model_registry
+from src.cnnClassifier.pipeline.micro_batcher import MicroBatcher
+from src.cnnClassifier.pipeline.result_cache import ResultCache
+from src.cnnClassifier.pipeline.async_service import AsyncPredictionService, Overloaded, BatchTooLarge
+# Same module path prediction.py records into; a src.cnnClassifier import would be a separate copy
+from cnnClassifier.pipeline.serving_metrics import REGISTRY, REQUEST_SECONDS
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+MAX_BODY_BYTES = 32 * 2**20
+
+service = None
+index_html = None
+
+
+def read_index_html() -> bytes:
+    with open(os.path.join(ROOT_DIR, "templates", "index.html"), "rb") as f:
+        return f.read()
+
+
+def create_service() -> AsyncPredictionService:
+    serving_config = ConfigurationManager(*find_config_files(ROOT_DIR)).get_serving_config()
+    classifier = PredictionPipeline(
+        registry=get_model_registry(serving_config.model_path),
+        cache=ResultCache(serving_config.result_cache_size, serving_config.result_cache_ttl_s)
+        if serving_config.result_cache_size else None
+    )
+    classifier.warm_up()
+    batcher = MicroBatcher(
+        classifier.predict_batch,
+        max_batch_size=serving_config.max_batch_size,
+        max_wait_ms=serving_config.max_wait_ms
+    )
+    return AsyncPredictionService(
+        classifier, batcher,
+        max_workers=serving_config.async_workers or None,
+        max_in_flight=serving_config.max_in_flight,
+        timeout_s=serving_config.request_timeout_s
+    )
+
+
+async def send_response(send, status: int, body: bytes, content_type: bytes = b"application/json", headers=()):
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"access-control-allow-origin", b"*"), *headers],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_json(send, status: int, data, headers=()):
+    await send_response(send, status, json.dumps(data).encode(), headers=headers)
+
+
+async def read_body(receive) -> bytes:
+    body = bytearray()
+    while True:
+        message = await receive()
+        body.extend(message.get("body", b""))
+        if len(body) > MAX_BODY_BYTES:
+            raise ValueError(f"Request body larger than {MAX_BODY_BYTES} bytes")
+        if not message.get("more_body", False):
+            return bytes(body)
+
+
+async def lifespan(receive, send):
+    global service, index_html
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # Model loading and file reads block, keep them off the event loop
+            loop = asyncio.get_running_loop()
+            index_html = await loop.run_in_executor(None, read_index_html)
+            service = await loop.run_in_executor(None, create_service)
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            if service is not None:
+                service.close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def predict_one(image_b64: str) -> list:
+    """Same body as Flask's /predict: a one-item list, with prediction errors as {"error": ...}"""
+    try:
+        return [await service.predict(image_b64)]
+    except (Overloaded, asyncio.TimeoutError):
+        raise
+    except Exception as e:
+        return [{"error": str(e)}]
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    path, method = scope["path"], scope["method"]
+    if method == "OPTIONS":
+        # CORS preflight for browser JSON posts
+        return await send_response(send, 204, b"", headers=[
+            (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+            (b"access-control-allow-headers", b"content-type"),
+        ])
+    if method == "GET" and path == "/":
+        return await send_response(send, 200, index_html, content_type=b"text/html; charset=utf-8")
+    if method == "GET" and path == "/metrics":
+        return await send_response(send, 200, REGISTRY.render().encode(), content_type=REGISTRY.CONTENT_TYPE.encode())
+    if method == "GET" and path == "/health":
+        return await send_json(send, 200, service.stats())
+    if method != "POST" or path not in ("/predict", "/predict/batch"):
+        return await send_json(send, 404, {"error": f"No route for {method} {path}"})
+
+    try:
+        with REQUEST_SECONDS.time(route=path):
+            payload = json.loads(await read_body(receive))
+            if path == "/predict/batch":
+                result = await service.predict_many(payload["images"])
+            else:
+                result = await predict_one(payload["image"])
+    except Overloaded as e:
+        return await send_json(send, 503, {"error": str(e)}, headers=[(b"retry-after", b"1")])
+    except BatchTooLarge as e:
+        return await send_json(send, 413, {"error": f"{e}; split it into smaller batches"})
+    except asyncio.TimeoutError:
+        return await send_json(send, 504, {"error": f"Prediction took longer than {service.timeout_s}s"})
+    except (ValueError, KeyError, TypeError) as e:
+        return await send_json(send, 400, {"error": f"Bad request: {e}"})
+    await send_json(send, 200, result)
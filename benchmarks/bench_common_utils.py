@@ -0,0 +1,35 @@
+"""Per-call cost of the utils.common helpers as plain functions vs wrapped in ensure_annotations"""
+import os
+import timeit
+import tempfile
+from pathlib import Path
+
+
+def _per_call_us(func, *args, number: int = 20000) -> float:
+    return round(min(timeit.repeat(lambda: func(*args), number=number, repeat=3)) / number * 1e6, 3)
+
+
+def run() -> dict:
+    from cnnClassifier.utils import common
+    try:
+        from ensure import ensure_annotations
+    except ImportError:
+        ensure_annotations = None
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        file_path = Path(work_dir) / "sample.bin"
+        file_path.write_bytes(os.urandom(4096))
+        calls = {
+            "get_size": (common.get_size, file_path),
+            "create_directories": (common.create_directories, [work_dir], False),
+        }
+
+        results = {"validation_enabled": common.VALIDATE_ANNOTATIONS}
+        for name, (func, *args) in calls.items():
+            plain = getattr(func, "__wrapped__", func)
+            result = {"plain_us": _per_call_us(plain, *args)}
+            if ensure_annotations is not None:
+                result["ensure_annotations_us"] = _per_call_us(ensure_annotations(plain), *args)
+                result["overhead_us"] = round(result["ensure_annotations_us"] - result["plain_us"], 3)
+            results[name] = result
+    return results
@@ -0,0 +1,28 @@
+"""Images/sec of model.evaluate vs the streaming evaluation engine over the same validation pipeline"""
+import time
+
+
+def run(model_path: str, data_dir: str, batch_size: int = 16) -> dict:
+    import tensorflow as tf
+    from cnnClassifier.components.data_pipeline import TFDataLoader
+    from cnnClassifier.components.streaming_evaluation import StreamingMetrics, evaluate_stream
+
+    model = tf.keras.models.load_model(model_path)
+    loader = TFDataLoader(data_dir, image_size=[224, 224, 3], batch_size=batch_size, validation_split=0.30)
+    dataset, samples = loader.dataset(subset="validation", shuffle=False)
+    # Warm up both paths so tracing is not timed
+    model.evaluate(dataset.take(1), verbose=0)
+    model.predict_on_batch(next(iter(dataset))[0])
+
+    start = time.perf_counter()
+    loss, accuracy = model.evaluate(dataset, verbose=0)[:2]
+    evaluate_sec = time.perf_counter() - start
+
+    streamed = evaluate_stream(model.predict_on_batch, dataset.as_numpy_iterator(), StreamingMetrics(loader.class_names))
+    return {
+        "images": samples,
+        "evaluate_images_per_sec": round(samples / evaluate_sec, 2),
+        "streaming_images_per_sec": streamed["images_per_sec"],
+        "accuracy_match": abs(streamed["accuracy"] - accuracy) < 1e-6,
+        "loss_delta": round(abs(streamed["loss"] - loss), 6),
+    }
@@ -0,0 +1,58 @@
+"""Cold import time of the entry points, each in a fresh interpreter, and which heavy modules they load"""
+import os
+import sys
+import json
+import statistics
+import subprocess
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("tensorflow", "keras", "mlflow", "gdown", "joblib")
+# Entry points that should start without any of HEAVY_MODULES
+TARGETS = {
+    "config": "from cnnClassifier.config.configuration import ConfigurationManager; ConfigurationManager()",
+    "check": "import check",
+    "main": "import main",
+    "app_home": "import app; app.app.test_client().get('/')",
+}
+BUDGET_SECONDS = 1.0
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print("IMPORT_TIME " + json.dumps({{"seconds": elapsed, "heavy_modules": heavy}}))
+"""
+
+
+def _measure_once(statement: str) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT_DIR, os.path.join(ROOT_DIR, "src"), env.get("PYTHONPATH")]))
+    completed = subprocess.run(
+        [sys.executable, "-c", _PROBE.format(statement=statement, heavy=HEAVY_MODULES)],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True
+    )
+    for line in completed.stdout.splitlines():
+        if line.startswith("IMPORT_TIME "):
+            return json.loads(line[len("IMPORT_TIME "):])
+    raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "no output")
+
+
+def run(repeats: int = 3) -> dict:
+    results = {}
+    for name, statement in TARGETS.items():
+        try:
+            runs = [_measure_once(statement) for _ in range(repeats)]
+        except RuntimeError as e:
+            results[name] = {"error": str(e)}
+            continue
+        seconds = statistics.median(r["seconds"] for r in runs)
+        heavy = runs[0]["heavy_modules"]
+        results[name] = {
+            "seconds": round(seconds, 4),
+            "heavy_modules": heavy,
+            "ok": seconds < BUDGET_SECONDS and not heavy,
+        }
+    return results
@@ -0,0 +1,100 @@
+"""Images/sec of the training input pipeline for each DATA_LOADER"""
+import os
+import time
+import zipfile
+from pathlib import Path
+
+
+def _training_config(work_dir: str, data_dir: str, data_loader: str, batch_size: int):
+    from cnnClassifier.entity.config_entity import TrainingConfig, CpuProfileConfig, DistributedConfig
+
+    return TrainingConfig(
+        root_dir=Path(work_dir),
+        trained_model_path=Path(work_dir) / "model.h5",
+        updated_base_model_path=Path(work_dir) / "base_model_updated.h5",
+        training_data=Path(data_dir),
+        params_epochs=1,
+        params_batch_size=batch_size,
+        params_is_augmentation=False,
+        params_image_size=[224, 224, 3],
+        params_data_loader=data_loader,
+        params_run_eagerly=False,
+        params_jit_compile=False,
+        throughput_report_path=Path(work_dir) / "throughput.json",
+        dataset_cache_dir=Path(work_dir) / "dataset_cache",
+        params_training_mode="full",
+        features_dir=Path(work_dir) / "features",
+        source_zip=Path(work_dir) / "data.zip",
+        cpu_profile=CpuProfileConfig(name="default", intra_op_threads=0, inter_op_threads=0,
+                                     onednn=True, mixed_bfloat16=False),
+        cpu_profile_report_path=Path(work_dir) / "cpu_profiles.json",
+        distributed=DistributedConfig(strategy="none", local_workers=1, port=0, timeout_s=3600),
+        distributed_dir=Path(work_dir) / "distributed",
+        checkpoint_dir=Path(work_dir) / "checkpoints",
+        params_early_stopping_patience=0
+    )
+
+
+def _cache_config(work_dir: str, data_dir: str):
+    from cnnClassifier.entity.config_entity import DatasetCacheConfig
+
+    return DatasetCacheConfig(
+        root_dir=Path(work_dir) / "dataset_cache",
+        source_dir=Path(data_dir),
+        num_workers=8,
+        params_image_size=[224, 224, 3],
+        params_data_loader="cache"
+    )
+
+
+def _build_cache(work_dir: str, data_dir: str):
+    from cnnClassifier.components.dataset_cache import DatasetCache
+
+    config = _cache_config(work_dir, data_dir)
+    os.makedirs(config.root_dir, exist_ok=True)
+    DatasetCache(config).build()
+
+
+def _build_zip(work_dir: str, data_dir: str):
+    """Zip the synthetic dataset under its folder name, the layout the ingestion zip has"""
+    with zipfile.ZipFile(Path(work_dir) / "data.zip", "w", zipfile.ZIP_STORED) as zf:
+        for root, _, files in os.walk(data_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                zf.write(path, os.path.join(Path(data_dir).name, os.path.relpath(path, data_dir)))
+
+
+LOADERS = ("keras", "tf_data", "cache", "zip")
+
+
+def run(work_dir: str, data_dir: str, batch_size: int = 16, loaders=LOADERS) -> dict:
+    from cnnClassifier.components.model_training import Training
+
+    results = {}
+    for data_loader in loaders:
+        if data_loader == "cache":
+            start = time.perf_counter()
+            _build_cache(work_dir, data_dir)
+            results["cache_build_sec"] = round(time.perf_counter() - start, 3)
+        if data_loader == "zip":
+            _build_zip(work_dir, data_dir)
+
+        training = Training(config=_training_config(work_dir, data_dir, data_loader, batch_size))
+        training.train_valid_generator()
+        steps = max(1, training.train_samples // batch_size)
+
+        try:
+            iterator = iter(training.train_generator)
+            next(iterator)
+            start = time.perf_counter()
+            for _ in range(steps):
+                next(iterator)
+            elapsed = time.perf_counter() - start
+        finally:
+            training.close_loaders()
+
+        results[data_loader] = {
+            "images": steps * batch_size,
+            "images_per_sec": round(steps * batch_size / elapsed, 2),
+        }
+    return results
@@ -0,0 +1,26 @@
+"""Cold and warm PredictionPipeline latency"""
+from benchmarks.synthetic import make_jpeg
+from benchmarks.utils import latency_summary, timed
+
+
+def run(model_path: str, iterations: int = 50) -> dict:
+    from cnnClassifier.pipeline.model_registry import ModelRegistry
+    from cnnClassifier.pipeline.prediction import PredictionPipeline
+
+    image = make_jpeg(seed=0)
+
+    # Cold: a fresh registry, so the first call pays for loading the model
+    pipeline = PredictionPipeline(registry=ModelRegistry(model_path))
+    _, cold = timed(pipeline.predict, image)
+
+    warm = [timed(pipeline.predict, image)[1] for _ in range(iterations)]
+
+    batch = [pipeline.load_image(make_jpeg(seed=i)) for i in range(16)]
+    pipeline.predict_batch(batch)
+    batched = [timed(pipeline.predict_batch, batch)[1] for _ in range(max(1, iterations // 5))]
+
+    return {
+        "cold_ms": round(cold * 1000.0, 3),
+        "warm": latency_summary(warm),
+        "batch_16": latency_summary(batched),
+    }
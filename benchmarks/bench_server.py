@@ -0,0 +1,69 @@
+"""/predict throughput under concurrent clients, in-process or against a running server"""
+import json
+import time
+import base64
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.synthetic import make_jpeg
+from benchmarks.utils import latency_summary
+
+
+def _in_process_client(model_path: str):
+    import app as flask_app
+    from cnnClassifier.pipeline.model_registry import ModelRegistry
+    from cnnClassifier.pipeline.prediction import PredictionPipeline
+
+    flask_app.clApp = flask_app.ClientApp(
+        classifier=PredictionPipeline(registry=ModelRegistry(model_path))
+    )
+
+    def post(path: str, payload: dict):
+        client = flask_app.app.test_client()
+        response = client.post(path, json=payload)
+        return response.status_code
+    return post
+
+
+def _http_client(url: str):
+    def post(path: str, payload: dict):
+        request = urllib.request.Request(
+            url.rstrip("/") + path,
+            data=json.dumps(payload).encode(),
+            headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            return response.status
+    return post
+
+
+def run(model_path: str = None, clients: int = 8, requests_per_client: int = 25, url: str = None) -> dict:
+    post = _http_client(url) if url else _in_process_client(model_path)
+    images = [base64.b64encode(make_jpeg(seed=i)).decode() for i in range(clients)]
+
+    # One request first so model warm-up and route setup are not measured
+    post("/predict", {"image": images[0]})
+
+    def client(index: int):
+        latencies, errors = [], 0
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            status = post("/predict", {"image": images[index]})
+            latencies.append(time.perf_counter() - start)
+            errors += status != 200
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(client, range(clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [latency for client_latencies, _ in results for latency in client_latencies]
+    return {
+        "target": url or "flask test client",
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "requests_per_sec": round(len(latencies) / elapsed, 2),
+        "latency": latency_summary(latencies),
+    }
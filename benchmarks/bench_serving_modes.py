@@ -0,0 +1,65 @@
+"""Load test of the Flask development server (python app.py) against the pre-fork gunicorn server"""
+import os
+import sys
+import time
+import subprocess
+import urllib.request
+import yaml
+from benchmarks import bench_server
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+URL = "http://127.0.0.1:8080"
+
+
+def _write_config(work_dir: str, model_path: str, workers: int):
+    """Copy of the repo config with serving pointed at the benchmark model; servers run with cwd=work_dir"""
+    with open(os.path.join(ROOT_DIR, "config", "config.yaml")) as f:
+        config = yaml.safe_load(f)
+    config["artifacts_root"] = os.path.join(work_dir, "artifacts")
+    config["serving"].update(backend="keras", model_path=model_path, workers=workers)
+
+    os.makedirs(os.path.join(work_dir, "config"), exist_ok=True)
+    with open(os.path.join(work_dir, "config", "config.yaml"), "w") as f:
+        yaml.safe_dump(config, f)
+    with open(os.path.join(ROOT_DIR, "params.yaml")) as src, open(os.path.join(work_dir, "params.yaml"), "w") as dst:
+        dst.write(src.read())
+
+
+def _wait_until_up(process: subprocess.Popen, timeout: float = 120.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(URL + "/", timeout=1):
+                return
+        except OSError:
+            time.sleep(0.5)
+    raise TimeoutError(f"Server did not come up within {timeout}s")
+
+
+def _measure(command, work_dir: str, clients: int, requests_per_client: int) -> dict:
+    process = subprocess.Popen(command, cwd=work_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _wait_until_up(process)
+        return bench_server.run(clients=clients, requests_per_client=requests_per_client, url=URL)
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def run(work_dir: str, model_path: str, workers: int = 2, clients: int = 8, requests_per_client: int = 25) -> dict:
+    _write_config(work_dir, model_path, workers)
+    modes = {
+        "flask_dev": [sys.executable, os.path.join(ROOT_DIR, "app.py")],
+        "prefork": [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT_DIR, "gunicorn.conf.py"),
+                    "--pythonpath", ROOT_DIR, "--bind", "127.0.0.1:8080", "app:app"],
+    }
+    results = {"workers": workers}
+    for name, command in modes.items():
+        results[name] = _measure(command, work_dir, clients, requests_per_client)
+    results["speedup"] = round(
+        results["prefork"]["requests_per_sec"] / results["flask_dev"]["requests_per_sec"], 2
+    ) if results["flask_dev"]["requests_per_sec"] else None
+    return results
@@ -0,0 +1,90 @@
+"""Run the benchmark suite against a synthetic model and dataset and write results to JSON.
+
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/abc1234.json
+    python -m benchmarks.run_benchmarks --only serving_modes --workers 4   (needs gunicorn)
+"""
+import os
+import json
+import argparse
+import tempfile
+from benchmarks import bench_prediction, bench_server, bench_input_pipeline, bench_serving_modes, bench_import_time, bench_common_utils, bench_evaluation
+from benchmarks.synthetic import make_model, make_dataset
+from benchmarks.utils import environment, write_results
+
+
+def compare(baseline_path: str, results: dict, prefix: str = ""):
+    """Print numeric metrics that moved by more than 10% against a previous result file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+
+    def walk(old, new, path):
+        for key, value in new.items():
+            if key not in old:
+                continue
+            if isinstance(value, dict):
+                walk(old[key], value, f"{path}{key}.")
+            elif isinstance(value, (int, float)) and isinstance(old[key], (int, float)) and old[key]:
+                change = (value - old[key]) / old[key] * 100.0
+                if abs(change) > 10.0:
+                    print(f"{path}{key}: {old[key]} -> {value} ({change:+.1f}%)")
+
+    walk(baseline, results, prefix)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="*", choices=["import_time", "common_utils", "prediction", "server", "input_pipeline", "evaluation", "serving_modes"])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests-per-client", type=int, default=25)
+    parser.add_argument("--images-per-class", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=2, help="pre-fork workers for serving_modes")
+    parser.add_argument("--url", help="benchmark a running server instead of the Flask test client")
+    parser.add_argument("--output-dir", default=os.path.join("benchmarks", "results"))
+    parser.add_argument("--compare", help="previous result file to diff against")
+    args = parser.parse_args()
+    selected = set(args.only or ["import_time", "common_utils", "prediction", "server", "input_pipeline", "evaluation"])
+
+    results = {"environment": environment()}
+    if "import_time" in selected:
+        results["import_time"] = bench_import_time.run()
+        for name, result in results["import_time"].items():
+            if not result.get("ok", True):
+                print(f"WARNING: import of {name} took {result['seconds']}s and loaded {result['heavy_modules']} "
+                      f"(budget {bench_import_time.BUDGET_SECONDS}s, no heavy modules)")
+    if "common_utils" in selected:
+        results["common_utils"] = bench_common_utils.run()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        model_path = make_model(os.path.join(work_dir, "model.h5"))
+
+        if "prediction" in selected:
+            results["prediction"] = bench_prediction.run(model_path, iterations=args.iterations)
+        if "server" in selected:
+            results["server"] = bench_server.run(
+                model_path, clients=args.clients,
+                requests_per_client=args.requests_per_client, url=args.url
+            )
+        if {"input_pipeline", "evaluation"} & selected:
+            data_dir = make_dataset(os.path.join(work_dir, "data"), images_per_class=args.images_per_class)
+        if "input_pipeline" in selected:
+            results["input_pipeline"] = bench_input_pipeline.run(work_dir, data_dir)
+        if "evaluation" in selected:
+            results["evaluation"] = bench_evaluation.run(model_path, data_dir)
+        if "serving_modes" in selected:
+            # Starts real servers on port 8080, so only when asked for
+            results["serving_modes"] = bench_serving_modes.run(
+                work_dir, model_path, workers=args.workers, clients=args.clients,
+                requests_per_client=args.requests_per_client
+            )
+
+    print(json.dumps(results, indent=4))
+    path = write_results(results, args.output_dir)
+    print(f"Results written to {path}")
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
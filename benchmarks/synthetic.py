@@ -0,0 +1,40 @@
+"""Synthetic model and images so benchmarks run without the dataset, a trained model or a GPU"""
+import io
+import os
+import numpy as np
+from PIL import Image
+
+
+def make_model(path: str, image_size=(224, 224, 3), classes: int = 2) -> str:
+    """Save a small CNN with the serving model's input/output contract to an H5 file"""
+    import tensorflow as tf
+
+    inputs = tf.keras.Input(shape=image_size)
+    x = tf.keras.layers.Conv2D(8, 3, strides=2, activation="relu")(inputs)
+    x = tf.keras.layers.MaxPooling2D(4)(x)
+    x = tf.keras.layers.Flatten()(x)
+    outputs = tf.keras.layers.Dense(classes, activation="softmax")(x)
+    model = tf.keras.models.Model(inputs=inputs, outputs=outputs)
+    model.compile(optimizer="adam", loss="categorical_crossentropy", metrics=["accuracy"])
+    model.save(path)
+    return path
+
+
+def make_jpeg(seed: int, size=(512, 512)) -> bytes:
+    """A random-noise JPEG, larger than the model input so decode + resize costs are realistic"""
+    rng = np.random.default_rng(seed)
+    pixels = rng.integers(0, 256, size=(size[1], size[0], 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def make_dataset(root: str, classes=("Normal", "Tumor"), images_per_class: int = 64) -> str:
+    """Write a flow_from_directory style folder of synthetic JPEGs"""
+    for label, class_name in enumerate(classes):
+        class_dir = os.path.join(root, class_name)
+        os.makedirs(class_dir, exist_ok=True)
+        for i in range(images_per_class):
+            with open(os.path.join(class_dir, f"{i:05d}.jpg"), "wb") as f:
+                f.write(make_jpeg(seed=label * 100000 + i))
+    return root
@@ -0,0 +1,47 @@
+"""Pre-fork production server for app.py
+
+    gunicorn -c gunicorn.conf.py app:app
+
+Each of serving.workers processes loads the model, starts its own
+micro-batcher and warms the model up. Inference threads are split across
+workers so they do not oversubscribe the cores; set the worker count with
+WEB_CONCURRENCY rather than -w so the split follows it.
+
+With serving.preload and the tflite backend the parent reads the model bytes
+once and the workers share them copy-on-write. The keras backend never
+preloads: loading a Keras model starts TensorFlow's thread pools, which are
+not fork-safe, and workers forked after that can hang.
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from src.cnnClassifier.config.configuration import ConfigurationManager, find_config_files
+from src.cnnClassifier.pipeline.model_registry import set_inference_threads
+
+serving_config = ConfigurationManager(*find_config_files(os.path.dirname(os.path.abspath(__file__)))).get_serving_config()
+
+bind = os.getenv("BIND", "0.0.0.0:8080")
+workers = int(os.getenv("WEB_CONCURRENCY", serving_config.workers))
+worker_class = "gthread"
+threads = serving_config.threads
+preload_app = serving_config.preload and serving_config.backend == "tflite"
+if serving_config.preload and not preload_app:
+    print(f"serving.preload ignored for the {serving_config.backend} backend, each worker loads the model", file=sys.stderr)
+# First requests after a hot-swap can take a while on CPU
+timeout = 120
+
+intra_op_threads = serving_config.intra_op_threads or max(1, (os.cpu_count() or 1) // workers)
+# Must happen before the app (and TensorFlow) is imported for the preload
+set_inference_threads(intra_op_threads, serving_config.inter_op_threads)
+
+
+def on_starting(server):
+    if preload_app:
+        import app
+        app.preload_model()
+
+
+def post_worker_init(worker):
+    import app
+    app.init_worker()
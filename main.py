@@ -1,52 +1,106 @@
-from cnnClassifier import logger
-from cnnClassifier.pipeline.stage_01_data_ingestion import DataIngestionTrainingPipeline
-from cnnClassifier.pipeline.stage_02_prepare_base_model import PrepareBaseModelTrainingPipeline
-from cnnClassifier.pipeline.stage_03_model_training import ModelTrainingPipeline
-from cnnClassifier.pipeline.stage_04_model_evaluation import EvaluationPipeline
-
-
-STAGE_NAME = "Data Ingestion stage"
-try:
-   logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<") 
-   data_ingestion = DataIngestionTrainingPipeline()
-   data_ingestion.main()
-   logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
-except Exception as e:
-        logger.exception(e)
-        raise e
-
-
-STAGE_NAME = "Prepare base model"
-try: 
-   logger.info(f"*******************")
-   logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
-   prepare_base_model = PrepareBaseModelTrainingPipeline()
-   prepare_base_model.main()
-   logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
-except Exception as e:
-        logger.exception(e)
-        raise e
-
-
-STAGE_NAME = "Training"
-try: 
-   logger.info(f"*******************")
-   logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
-   model_trainer = ModelTrainingPipeline()
-   model_trainer.main()
-   logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
-except Exception as e:
-        logger.exception(e)
-        raise e
-
-
-STAGE_NAME = "Evaluation"
-try: 
-   logger.info(f"*******************")
-   logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
-   model_evaluator = EvaluationPipeline()
-   model_evaluator.main()
-   logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
-except Exception as e:
-        logger.exception(e)
-        raise e
\ No newline at end of file
+import argparse
+from cnnClassifier.config.configuration import ConfigurationManager
+from cnnClassifier.pipeline.stage_runner import Stage, StageRunner
+from cnnClassifier.utils.cpu_profile import configure_cpu_environment
+
+
+SRC = "src/cnnClassifier"
+# Stage pipelines are imported only when they run, so a run that skips
+# everything never loads TensorFlow
+PIPELINE = "cnnClassifier.pipeline"
+# Modules behind build_loader, read by every stage that loads images through DATA_LOADER
+DATA_LOADER_CODE = [f"{SRC}/components/data_pipeline.py", f"{SRC}/components/dataset_cache.py",
+                    f"{SRC}/components/zip_dataset.py", f"{SRC}/utils/preprocessing.py", f"{SRC}/utils/common.py"]
+
+
+def pipeline_stages(config: ConfigurationManager):
+    """Yield the stages in order; each one's config is built only when the runner gets to it"""
+    data_ingestion = config.get_data_ingestion_config()
+    yield Stage(
+        name="Data Ingestion stage",
+        pipeline=f"{PIPELINE}.stage_01_data_ingestion:DataIngestionTrainingPipeline",
+        config=data_ingestion,
+        params=["DATA_LOADER"],
+        deps=[f"{SRC}/pipeline/stage_01_data_ingestion.py", f"{SRC}/components/data_ingestion.py",
+              f"{SRC}/utils/download.py", f"{SRC}/utils/common.py"],
+        # In zip mode the archive is the dataset and nothing is extracted
+        outs=[data_ingestion.local_data_file] + ([] if data_ingestion.params_data_loader == "zip" else
+                                                 [config.get_training_config().training_data])
+    )
+
+    dataset_cache = config.get_dataset_cache_config()
+    yield Stage(
+        name="Dataset cache",
+        pipeline=f"{PIPELINE}.stage_01b_dataset_cache:DatasetCachePipeline",
+        config=dataset_cache,
+        params=["IMAGE_SIZE", "DATA_LOADER"],
+        deps=[f"{SRC}/pipeline/stage_01b_dataset_cache.py", f"{SRC}/components/dataset_cache.py",
+              f"{SRC}/utils/preprocessing.py", f"{SRC}/utils/common.py", dataset_cache.source_dir],
+        outs=[dataset_cache.root_dir]
+    )
+
+    prepare_base_model = config.get_prepare_base_model_config()
+    yield Stage(
+        name="Prepare base model",
+        pipeline=f"{PIPELINE}.stage_02_prepare_base_model:PrepareBaseModelTrainingPipeline",
+        config=prepare_base_model,
+        params=["IMAGE_SIZE", "INCLUDE_TOP", "CLASSES", "WEIGHTS", "LEARNING_RATE"],
+        deps=[f"{SRC}/pipeline/stage_02_prepare_base_model.py", f"{SRC}/components/prepare_base_model.py",
+              f"{SRC}/utils/common.py"],
+        outs=[prepare_base_model.base_model_path, prepare_base_model.updated_base_model_path]
+    )
+
+    training = config.get_training_config()
+    yield Stage(
+        name="Training",
+        pipeline=f"{PIPELINE}.stage_03_model_training:ModelTrainingPipeline",
+        config=training,
+        params=["IMAGE_SIZE", "EPOCHS", "EARLY_STOPPING_PATIENCE", "BATCH_SIZE", "AUGMENTATION", "DATA_LOADER",
+                "RUN_EAGERLY", "JIT_COMPILE", "TRAINING_MODE", "CPU_PROFILE", "CPU_PROFILES", "DISTRIBUTED"],
+        deps=[f"{SRC}/pipeline/stage_03_model_training.py", f"{SRC}/components/model_training.py",
+              f"{SRC}/components/feature_extraction.py", f"{SRC}/utils/cpu_profile.py",
+              f"{SRC}/utils/distributed.py", *DATA_LOADER_CODE,
+              training.training_data, training.source_zip, training.dataset_cache_dir,
+              training.updated_base_model_path],
+        outs=[training.trained_model_path]
+    )
+
+    evaluation = config.get_evaluation_config()
+    yield Stage(
+        name="Evaluation",
+        pipeline=f"{PIPELINE}.stage_04_model_evaluation:EvaluationPipeline",
+        config=evaluation,
+        params=["IMAGE_SIZE", "BATCH_SIZE", "DATA_LOADER", "CPU_PROFILE", "CPU_PROFILES"],
+        deps=[f"{SRC}/pipeline/stage_04_model_evaluation.py", f"{SRC}/components/model_evaluation_mlflow.py",
+              f"{SRC}/components/streaming_evaluation.py", f"{SRC}/utils/cpu_profile.py",
+              f"{SRC}/utils/distributed.py", *DATA_LOADER_CODE,
+              evaluation.training_data, evaluation.source_zip, evaluation.dataset_cache_dir,
+              evaluation.model_path],
+        outs=["scores.json"]
+    )
+
+    model_export = config.get_model_export_config()
+    yield Stage(
+        name="Model export",
+        pipeline=f"{PIPELINE}.stage_05_model_export:ModelExportPipeline",
+        config=model_export,
+        params=["QUANTIZATION", "IMAGE_SIZE", "BATCH_SIZE", "DATA_LOADER"],
+        deps=[f"{SRC}/pipeline/stage_05_model_export.py", f"{SRC}/components/model_export.py",
+              f"{SRC}/pipeline/tflite_backend.py", *DATA_LOADER_CODE,
+              model_export.model_path, model_export.training_data, model_export.source_zip,
+              model_export.dataset_cache_dir],
+        outs=[model_export.tflite_model_path, model_export.report_path, model_export.serving_model_path]
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the training pipeline, skipping stages whose inputs are unchanged")
+    parser.add_argument("--force", action="store_true", help="run every stage even if its fingerprint matches")
+    args = parser.parse_args()
+
+    # Only reads the config: each stage's pipeline creates its directories when it actually runs
+    config = ConfigurationManager(create_dirs=False)
+    # oneDNN is read once when TensorFlow loads, so set it before any stage imports it
+    configure_cpu_environment(config.get_cpu_profile_config())
+    runner = StageRunner(all_params=config.params, force=args.force)
+    runner.run_all(pipeline_stages(config))
@@ -0,0 +1,213 @@
+import numpy as np
+import tensorflow as tf
+from pathlib import Path
+from cnnClassifier import logger
+from cnnClassifier.components.dataset_cache import CachedDataset
+from cnnClassifier.components.zip_dataset import ZipImageDataset
+from cnnClassifier.utils.common import list_class_files, split_range
+from cnnClassifier.utils.preprocessing import RESCALE, ImagePreprocessor
+
+
+AUTOTUNE = tf.data.AUTOTUNE
+
+
+def list_image_files(directory, validation_split: float, subset: str):
+    """List image paths and labels with the same split as flow_from_directory(validation_split=...)"""
+    class_names, class_files = list_class_files(directory)
+    paths, labels = [], []
+    for label, files in enumerate(class_files):
+        selected = [files[i] for i in split_range(len(files), validation_split, subset)]
+        paths.extend(selected)
+        labels.extend([label] * len(selected))
+
+    return paths, labels, class_names
+
+
+def shard_items(items, shard):
+    """This worker's part of `items` for shard=(num_shards, index).
+
+    Every shard gets the same length, so all workers run the same number of
+    steps; up to num_shards - 1 trailing items are dropped.
+    """
+    if shard is None:
+        return items
+    num_shards, index = shard
+    usable = len(items) // num_shards * num_shards
+    return items[index:usable:num_shards]
+
+
+def augmentation_layers() -> tf.keras.Sequential:
+    """Batched equivalent of the ImageDataGenerator augmentation used in training
+
+    Shear has no Keras preprocessing layer and is left out.
+    """
+    return tf.keras.Sequential([
+        tf.keras.layers.RandomRotation(40 / 360, fill_mode="nearest"),
+        tf.keras.layers.RandomFlip("horizontal"),
+        tf.keras.layers.RandomTranslation(0.2, 0.2, fill_mode="nearest"),
+        tf.keras.layers.RandomZoom(0.2, fill_mode="nearest"),
+    ])
+
+
+class TFDataLoader:
+    """tf.data input pipeline with parallel reads, decode/resize/augment and prefetching
+
+    Decode and resize go through the shared ImagePreprocessor, so training sees
+    the same pixels as serving.
+    """
+
+    def __init__(self, directory, image_size, batch_size: int, validation_split: float):
+        self.directory = str(directory)
+        self.preprocessor = ImagePreprocessor(image_size)
+        self.target_size = self.preprocessor.target_size
+        self.batch_size = batch_size
+        self.validation_split = validation_split
+
+    @property
+    def class_names(self) -> list:
+        # Same order as list_class_files, without walking every class folder
+        return sorted(p.name for p in Path(self.directory).iterdir() if p.is_dir())
+
+    def _list(self, subset: str):
+        return list_image_files(self.directory, self.validation_split, subset)
+
+    def _read(self, path):
+        return tf.io.read_file(path)
+
+    def _decode(self, path, label):
+        raw = self._read(path)
+        img = tf.numpy_function(self.preprocessor.resize, [raw], tf.uint8)
+        img.set_shape((*self.target_size, 3))
+        return tf.cast(img, tf.float32) * RESCALE, label
+
+    def dataset(self, subset: str, shuffle: bool, augment: bool = False, shard=None):
+        """Return (dataset, number of samples) for the 'training' or 'validation' subset
+
+        With shard=(num_shards, index) only that worker's share of the files is read.
+        """
+        paths, labels, class_names = self._list(subset)
+        paths, labels = shard_items(paths, shard), shard_items(labels, shard)
+        logger.info(f"tf.data {subset} subset: {len(paths)} images in {len(class_names)} classes")
+
+        ds = tf.data.Dataset.from_tensor_slices((paths, labels))
+        if shuffle:
+            ds = ds.shuffle(len(paths), reshuffle_each_iteration=True)
+        ds = ds.map(
+            lambda path, label: self._decode(path, tf.one_hot(label, len(class_names))),
+            num_parallel_calls=AUTOTUNE,
+            deterministic=not shuffle
+        )
+        ds = ds.batch(self.batch_size)
+        if augment:
+            augmenter = augmentation_layers()
+            ds = ds.map(
+                lambda x, y: (augmenter(x, training=True), y),
+                num_parallel_calls=AUTOTUNE
+            )
+        return ds.prefetch(AUTOTUNE), len(paths)
+
+    def close(self):
+        """Release what the loader holds open; its datasets must not be iterated afterwards"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ZipDataLoader(TFDataLoader):
+    """TFDataLoader variant that decodes members of the dataset zip instead of extracted files"""
+
+    def __init__(self, zip_path, root: str, image_size, batch_size: int, validation_split: float):
+        super().__init__(zip_path, image_size, batch_size, validation_split)
+        self.archive = ZipImageDataset(zip_path, root=root)
+
+    @property
+    def class_names(self) -> list:
+        return self.archive.class_names
+
+    def _list(self, subset: str):
+        names, labels = self.archive.list_members(self.validation_split, subset)
+        return names, labels, self.archive.class_names
+
+    def _read(self, name):
+        raw = tf.numpy_function(lambda n: self.archive.read(n.decode()), [name], tf.string)
+        raw.set_shape([])
+        return raw
+
+    def close(self):
+        self.archive.close()
+
+
+class CachedDataLoader:
+    """tf.data input pipeline streaming pre-resized images from the dataset cache"""
+
+    def __init__(self, cache_dir, image_size, batch_size: int, validation_split: float):
+        self.cache = CachedDataset(cache_dir, image_size=image_size)
+        self.batch_size = batch_size
+        self.validation_split = validation_split
+
+    @property
+    def class_names(self) -> list:
+        return self.cache.class_names
+
+    def dataset(self, subset: str, shuffle: bool, augment: bool = False, shard=None):
+        """Return (dataset, number of samples) for the 'training' or 'validation' subset
+
+        With shard=(num_shards, index) only that worker's share of the images is read.
+        """
+        indices = shard_items(self.cache.subset_indices(self.validation_split, subset), shard)
+        images, labels = self.cache.images, self.cache.labels
+        num_classes = len(self.cache.class_names)
+        logger.info(f"Cached {subset} subset: {len(indices)} images from {self.cache.cache_dir}")
+
+        def batches():
+            order = np.random.permutation(indices) if shuffle else indices
+            for start in range(0, len(order), self.batch_size):
+                # Sorted reads keep the memory-mapped access mostly sequential
+                batch = np.sort(order[start:start + self.batch_size])
+                yield images[batch], labels[batch]
+
+        height, width = images.shape[1:3]
+        ds = tf.data.Dataset.from_generator(
+            batches,
+            output_signature=(
+                tf.TensorSpec(shape=(None, height, width, 3), dtype=tf.uint8),
+                tf.TensorSpec(shape=(None,), dtype=tf.int64)
+            )
+        )
+        ds = ds.map(
+            lambda x, y: (tf.cast(x, tf.float32) * RESCALE, tf.one_hot(y, num_classes)),
+            num_parallel_calls=AUTOTUNE
+        )
+        if augment:
+            augmenter = augmentation_layers()
+            ds = ds.map(
+                lambda x, y: (augmenter(x, training=True), y),
+                num_parallel_calls=AUTOTUNE
+            )
+        return ds.prefetch(AUTOTUNE), len(indices)
+
+    def close(self):
+        """Nothing to release: the memory-mapped cache is freed with the loader"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_loader(data_loader: str, training_data, dataset_cache_dir, source_zip,
+                 image_size, batch_size: int, validation_split: float):
+    """tf.data loader for a DATA_LOADER setting ('keras' and 'tf_data' both read the extracted files)"""
+    kwargs = dict(image_size=image_size, batch_size=batch_size, validation_split=validation_split)
+    if data_loader == "cache":
+        return CachedDataLoader(cache_dir=dataset_cache_dir, **kwargs)
+    if data_loader == "zip":
+        # The archive keeps the dataset under the same folder name it is extracted to
+        return ZipDataLoader(zip_path=source_zip, root=Path(training_data).name, **kwargs)
+    if data_loader in ("keras", "tf_data"):
+        return TFDataLoader(directory=training_data, **kwargs)
+    raise ValueError(f"Unknown DATA_LOADER: {data_loader}")
@@ -0,0 +1,141 @@
+import os
+import json
+import shutil
+import hashlib
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from cnnClassifier import logger
+from cnnClassifier.entity.config_entity import DatasetCacheConfig
+from cnnClassifier.utils.common import list_class_files, split_range, file_digest
+from cnnClassifier.utils.preprocessing import ImagePreprocessor
+
+
+MANIFEST_FILE = "manifest.json"
+
+
+class DatasetCache:
+    """Decoded, resized uint8 images and labels stored once as memory-mappable .npy files.
+
+    Layout under root_dir:
+        manifest.json         key of the current cache
+        <key>/images.npy      (N, height, width, 3) uint8, class-major in flow_from_directory order
+        <key>/labels.npy      (N,) int64 class indices
+        <key>/meta.json       class names and per-class counts
+    """
+
+    def __init__(self, config: DatasetCacheConfig):
+        self.config = config
+        self.root_dir = Path(config.root_dir)
+
+    def _cache_key(self, class_names, class_files, digests) -> str:
+        key = hashlib.sha256()
+        key.update(json.dumps(list(self.config.params_image_size)).encode())
+        for class_name, files in zip(class_names, class_files):
+            for path in files:
+                rel = os.path.relpath(path, self.config.source_dir)
+                key.update(f"{class_name}/{rel}:{digests[path]}\n".encode())
+        return key.hexdigest()[:16]
+
+    def build(self) -> Path:
+        """Write the cache unless one for the same image size and source files already exists"""
+        if self.config.params_data_loader == "zip":
+            # Nothing is extracted in zip mode, and nothing would read the cache
+            logger.info("DATA_LOADER is zip, skipping the dataset cache")
+            return None
+
+        class_names, class_files = list_class_files(self.config.source_dir)
+        all_files = [path for files in class_files for path in files]
+
+        with ThreadPoolExecutor(max_workers=self.config.num_workers) as pool:
+            digests = dict(zip(all_files, pool.map(lambda path: file_digest(path, "sha1"), all_files)))
+        key = self._cache_key(class_names, class_files, digests)
+        cache_dir = self.root_dir / key
+
+        if (cache_dir / "meta.json").exists():
+            logger.info(f"Dataset cache {cache_dir} is up to date, skipping")
+            self._write_manifest(key)
+            return cache_dir
+
+        if cache_dir.exists():
+            shutil.rmtree(cache_dir)
+        os.makedirs(cache_dir, exist_ok=True)
+
+        preprocessor = ImagePreprocessor(self.config.params_image_size)
+        height, width = preprocessor.target_size
+        images = np.lib.format.open_memmap(
+            cache_dir / "images.npy", mode="w+", dtype=np.uint8,
+            shape=(len(all_files), height, width, 3)
+        )
+        labels = np.concatenate([
+            np.full(len(files), label, dtype=np.int64) for label, files in enumerate(class_files)
+        ]) if all_files else np.empty(0, dtype=np.int64)
+
+        def _write(index):
+            images[index] = preprocessor.resize(all_files[index])
+
+        logger.info(f"Caching {len(all_files)} images at {height}x{width} into {cache_dir}")
+        with ThreadPoolExecutor(max_workers=self.config.num_workers) as pool:
+            list(pool.map(_write, range(len(all_files))))
+        images.flush()
+        del images
+        np.save(cache_dir / "labels.npy", labels)
+
+        # meta.json is written last, so its presence marks a complete cache
+        with open(cache_dir / "meta.json", "w") as f:
+            json.dump({
+                "key": key,
+                "image_size": list(self.config.params_image_size),
+                "class_names": class_names,
+                "class_counts": [len(files) for files in class_files]
+            }, f, indent=4)
+
+        self._write_manifest(key)
+        self._remove_stale(keep=key)
+        return cache_dir
+
+    def _write_manifest(self, key: str):
+        with open(self.root_dir / MANIFEST_FILE, "w") as f:
+            json.dump({"key": key}, f, indent=4)
+
+    def _remove_stale(self, keep: str):
+        for entry in self.root_dir.iterdir():
+            if entry.is_dir() and entry.name != keep:
+                shutil.rmtree(entry)
+
+
+class CachedDataset:
+    """Read side of DatasetCache; images are memory-mapped, never loaded whole"""
+
+    def __init__(self, root_dir, image_size=None):
+        root_dir = Path(root_dir)
+        manifest_path = root_dir / MANIFEST_FILE
+        if not manifest_path.exists():
+            raise FileNotFoundError(
+                f"Dataset cache not found in {root_dir}; run the dataset cache stage first"
+            )
+        with open(manifest_path) as f:
+            self.cache_dir = root_dir / json.load(f)["key"]
+        with open(self.cache_dir / "meta.json") as f:
+            self.meta = json.load(f)
+
+        if image_size is not None and list(self.meta["image_size"]) != list(image_size):
+            raise ValueError(
+                f"Dataset cache was built for IMAGE_SIZE {self.meta['image_size']}, "
+                f"expected {list(image_size)}; rerun the dataset cache stage"
+            )
+
+        self.images = np.load(self.cache_dir / "images.npy", mmap_mode="r")
+        self.labels = np.load(self.cache_dir / "labels.npy")
+
+    @property
+    def class_names(self) -> list:
+        return self.meta["class_names"]
+
+    def subset_indices(self, validation_split: float, subset: str) -> np.ndarray:
+        """Sample indices of a subset, split per class like flow_from_directory"""
+        indices, offset = [], 0
+        for count in self.meta["class_counts"]:
+            indices.extend(offset + i for i in split_range(count, validation_split, subset))
+            offset += count
+        return np.asarray(indices, dtype=np.int64)
@@ -0,0 +1,136 @@
+import os
+import json
+import shutil
+import hashlib
+from pathlib import Path
+import numpy as np
+import tensorflow as tf
+from cnnClassifier import logger
+from cnnClassifier.components.data_pipeline import AUTOTUNE, CachedDataLoader, ZipDataLoader
+from cnnClassifier.utils.common import list_class_files, file_digest
+from cnnClassifier.utils.preprocessing import INTERPOLATION
+
+
+def split_backbone_head(model: tf.keras.Model):
+    """Split a backbone + Flatten/Dense classifier into a frozen backbone and a trainable head.
+
+    The head reuses the model's own layer objects, so training it updates the
+    full model in place.
+    """
+    flatten_index = next(
+        (i for i, layer in enumerate(model.layers) if isinstance(layer, tf.keras.layers.Flatten)),
+        None
+    )
+    if flatten_index is None:
+        raise ValueError("Feature extraction needs a model with a Flatten layer between backbone and head")
+
+    backbone = tf.keras.models.Model(
+        inputs=model.input,
+        outputs=model.layers[flatten_index - 1].output
+    )
+    head_input = tf.keras.Input(shape=backbone.output_shape[1:])
+    x = head_input
+    for layer in model.layers[flatten_index:]:
+        x = layer(x)
+    head = tf.keras.models.Model(inputs=head_input, outputs=x)
+    return backbone, head
+
+
+class BottleneckFeatureCache:
+    """Backbone outputs computed once per dataset/weights combination and kept as .npy memmaps"""
+
+    def __init__(self, root_dir, backbone: tf.keras.Model, base_model_path, data_key: str):
+        self.root_dir = Path(root_dir)
+        self.backbone = backbone
+        key = hashlib.sha256()
+        key.update(file_digest(base_model_path, "sha1").encode())
+        key.update(data_key.encode())
+        self.cache_dir = self.root_dir / key.hexdigest()[:16]
+
+    def features(self, subset: str, dataset, num_samples: int):
+        """Return memory-mapped (features, labels) for a subset, extracting them on first use
+
+        dataset must yield (images, one-hot labels) batches in a fixed order without augmentation.
+        """
+        features_path = self.cache_dir / f"{subset}_features.npy"
+        labels_path = self.cache_dir / f"{subset}_labels.npy"
+        done_path = self.cache_dir / f"{subset}.done"
+
+        if not done_path.exists():
+            self._extract(dataset, num_samples, features_path, labels_path)
+            done_path.touch()
+        else:
+            logger.info(f"Reusing bottleneck features from {features_path}")
+
+        return np.load(features_path, mmap_mode="r"), np.load(labels_path, mmap_mode="r")
+
+    def _extract(self, dataset, num_samples, features_path, labels_path):
+        if self.root_dir.exists():
+            for entry in self.root_dir.iterdir():
+                if entry.is_dir() and entry != self.cache_dir:
+                    shutil.rmtree(entry)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        logger.info(f"Extracting bottleneck features for {num_samples} images into {features_path}")
+        features = np.lib.format.open_memmap(
+            features_path, mode="w+", dtype=np.float32,
+            shape=(num_samples,) + tuple(self.backbone.output_shape[1:])
+        )
+        labels = None
+        offset = 0
+        for images, batch_labels in dataset:
+            if offset >= num_samples:
+                break
+            batch_features = self.backbone(images, training=False).numpy()
+            batch_labels = np.asarray(batch_labels)
+            if labels is None:
+                labels = np.lib.format.open_memmap(
+                    labels_path, mode="w+", dtype=np.float32,
+                    shape=(num_samples,) + batch_labels.shape[1:]
+                )
+            n = min(len(batch_features), num_samples - offset)
+            features[offset:offset + n] = batch_features[:n]
+            labels[offset:offset + n] = batch_labels[:n]
+            offset += n
+
+        if offset != num_samples:
+            raise RuntimeError(f"Expected {num_samples} samples, dataset produced {offset}")
+        features.flush()
+        labels.flush()
+
+
+def feature_dataset(features: np.ndarray, labels: np.ndarray, batch_size: int, shuffle: bool):
+    """tf.data pipeline over memory-mapped bottleneck features"""
+    def batches():
+        order = np.random.permutation(len(features)) if shuffle else np.arange(len(features))
+        for start in range(0, len(order), batch_size):
+            batch = np.sort(order[start:start + batch_size])
+            yield features[batch], labels[batch]
+
+    ds = tf.data.Dataset.from_generator(
+        batches,
+        output_signature=(
+            tf.TensorSpec(shape=(None,) + features.shape[1:], dtype=tf.float32),
+            tf.TensorSpec(shape=(None,) + labels.shape[1:], dtype=tf.float32)
+        )
+    )
+    return ds.prefetch(AUTOTUNE)
+
+
+def data_fingerprint(loader) -> str:
+    """Identify the images a loader reads, so features are re-extracted when the data changes"""
+    parts = [loader.validation_split]
+    if isinstance(loader, CachedDataLoader):
+        # The dataset cache key already hashes IMAGE_SIZE and the source file contents
+        parts.append(f"cache:{loader.cache.cache_dir.name}")
+    elif isinstance(loader, ZipDataLoader):
+        stat = os.stat(loader.directory)
+        parts.extend([list(loader.target_size), INTERPOLATION, loader.archive.root, stat.st_size, stat.st_mtime_ns])
+    else:
+        parts.extend([list(loader.target_size), INTERPOLATION])
+        _, class_files = list_class_files(loader.directory)
+        for files in class_files:
+            for path in files:
+                stat = os.stat(path)
+                parts.append([os.path.relpath(path, loader.directory), stat.st_size, stat.st_mtime_ns])
+    return json.dumps(parts)
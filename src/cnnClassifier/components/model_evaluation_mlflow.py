@@ -1,27 +1,41 @@
 import tensorflow as tf
 from pathlib import Path
-import mlflow
-import mlflow.keras
 from urllib.parse import urlparse
 import os
 from dotenv import load_dotenv
 from cnnClassifier.entity.config_entity import EvaluationConfig
 from cnnClassifier.utils.common import read_yaml, create_directories, save_json
+from cnnClassifier.utils.preprocessing import ImagePreprocessor
+from cnnClassifier.components.data_pipeline import build_loader
+from cnnClassifier.components.streaming_evaluation import StreamingMetrics, evaluate_stream, prefetch_batches
+from cnnClassifier.utils.cpu_profile import apply_cpu_profile, with_dtype_policy, save_profile_report
 
 
 class Evaluation:
     def __init__(self, config: EvaluationConfig):
         self.config = config
+        # Same CPU profile as training, so accuracy is measured the way the profile computes
+        self.cpu_settings = apply_cpu_profile(config.cpu_profile)
         # Load environment variables from .env file
         load_dotenv()
         
         # Debug: Print the actual config being used
         print(f"Debug - Config training_data path: {self.config.training_data}")
         print(f"Debug - Config model_path: {self.config.model_path}")
+        self.loader = None
 
     def _validate_paths(self):
         """Validate that all required paths exist before proceeding"""
         
+        if self.config.params_data_loader == "zip":
+            # Images are read from the dataset zip, nothing is extracted
+            for path in (Path(self.config.source_zip), Path(self.config.model_path)):
+                if not path.exists():
+                    raise FileNotFoundError(f"Required file not found: {path}")
+            print(f"  - Training data: {self.config.source_zip}")
+            print(f"  - Model file: {self.config.model_path}")
+            return True
+
         # Check training data path
         training_data_path = Path(self.config.training_data)
         if not training_data_path.exists():
@@ -64,16 +78,12 @@ class Evaluation:
 
     def _valid_generator(self):
         """Create validation data generator"""
-        datagenerator_kwargs = dict(
-            rescale=1./255,
-            validation_split=0.30
-        )
+        if self.config.params_data_loader in ("tf_data", "cache", "zip"):
+            return self._valid_dataset()
 
-        dataflow_kwargs = dict(
-            target_size=self.config.params_image_size[:-1],
-            batch_size=self.config.params_batch_size,
-            interpolation="bilinear"
-        )
+        preprocessor = ImagePreprocessor(self.config.params_image_size)
+        datagenerator_kwargs = preprocessor.datagenerator_kwargs(validation_split=0.30)
+        dataflow_kwargs = preprocessor.dataflow_kwargs(batch_size=self.config.params_batch_size)
 
         valid_datagenerator = tf.keras.preprocessing.image.ImageDataGenerator(
             **datagenerator_kwargs
@@ -87,10 +97,34 @@ class Evaluation:
             shuffle=False,
             **dataflow_kwargs
         )
+        self.valid_samples = self.valid_generator.samples
+        class_indices = self.valid_generator.class_indices
+        self.class_names = sorted(class_indices, key=class_indices.get)
+        # Indexed batch by batch (iterating the generator itself would never stop), loaded ahead on threads
+        self.valid_batches = prefetch_batches(self.valid_generator)
+
+    def _valid_dataset(self):
+        """Create validation tf.data pipeline from the JPEGs or the dataset cache"""
+        print(f"Creating validation dataset with DATA_LOADER: {self.config.params_data_loader}")
+        loader = self.loader = build_loader(
+            self.config.params_data_loader,
+            training_data=self.config.training_data,
+            dataset_cache_dir=self.config.dataset_cache_dir,
+            source_zip=self.config.source_zip,
+            image_size=self.config.params_image_size,
+            batch_size=self.config.params_batch_size,
+            validation_split=0.30
+        )
 
-    @staticmethod
-    def load_model(path: Path) -> tf.keras.Model:
-        return tf.keras.models.load_model(path)
+        self.valid_generator, self.valid_samples = loader.dataset(subset="validation", shuffle=False)
+        self.class_names = loader.class_names
+        self.valid_batches = self.valid_generator.as_numpy_iterator()
+
+    def load_model(self, path: Path) -> tf.keras.Model:
+        model = tf.keras.models.load_model(path)
+        if self.cpu_settings["mixed_bfloat16"]:
+            model = with_dtype_policy(model, "mixed_bfloat16")
+        return model
 
     def evaluation(self):
         """Run model evaluation with proper validation"""
@@ -108,26 +142,47 @@ class Evaluation:
             self._valid_generator()
             print("Validation generator created successfully")
             
-            # Evaluate model
-            self.score = self.model.evaluate(self.valid_generator)
+            # Stream batches through the model, accumulating metrics without keeping per-image results
+            self.results = evaluate_stream(
+                self.model.predict_on_batch,
+                self.valid_batches,
+                StreamingMetrics(self.class_names)
+            )
+            self.score = [self.results["loss"], self.results["accuracy"]]
             print(f" Evaluation completed!")
             print(f"   Loss: {self.score[0]:.4f}")
             print(f"   Accuracy: {self.score[1]:.4f}")
+            print(f"   ROC-AUC (macro): {self.results['macro_roc_auc']}")
+            print(f"   Throughput: {self.results['images_per_sec']} images/sec")
             
             # Save scores
             self.save_score()
             print("Scores saved to scores.json")
+            save_profile_report(
+                self.config.cpu_profile_report_path,
+                self.config.cpu_profile,
+                self.cpu_settings,
+                eval_loss=self.score[0],
+                eval_accuracy=self.score[1],
+                eval_images_per_sec=self.results["images_per_sec"]
+            )
             
         except Exception as e:
             print(f"Error during evaluation: {e}")
             raise
+        finally:
+            if self.loader is not None:
+                self.loader.close()
+                self.loader = None
 
     def save_score(self):
-        scores = {"loss": self.score[0], "accuracy": self.score[1]}
-        save_json(path=Path("scores.json"), data=scores)
+        # loss and accuracy stay top-level keys, the export stage and DVC read them
+        save_json(path=Path("scores.json"), data=self.results)
 
     def test_mlflow_connection(self):
         """Test MLflow connection to DagsHub using environment variables"""
+        # Imported here: mlflow is slow to import and only these methods use it
+        import mlflow
         try:
             # Set MLflow tracking URI from environment
             mlflow.set_tracking_uri(self.config.mlflow_uri)
@@ -150,6 +205,8 @@ class Evaluation:
 
     def log_into_mlflow(self):
         """Log model metrics and artifacts to MLflow (DagsHub) using environment variables"""
+        import mlflow
+        import mlflow.keras
         try:
             # MLflow will automatically use environment variables:
             # MLFLOW_TRACKING_URI, MLFLOW_TRACKING_USERNAME, MLFLOW_TRACKING_PASSWORD
@@ -181,10 +238,15 @@ class Evaluation:
                 print("Parameters logged successfully")
                 
                 # Log metrics
-                mlflow.log_metrics({
-                    "loss": self.score[0],
-                    "accuracy": self.score[1]
-                })
+                metrics = {"loss": self.score[0], "accuracy": self.score[1],
+                           "images_per_sec": self.results["images_per_sec"]}
+                if self.results["macro_roc_auc"] is not None:
+                    metrics["macro_roc_auc"] = self.results["macro_roc_auc"]
+                for name, class_metrics in self.results["per_class"].items():
+                    for key in ("precision", "recall"):
+                        if class_metrics[key] is not None:
+                            metrics[f"{key}_{name}"] = class_metrics[key]
+                mlflow.log_metrics(metrics)
                 print(f"Metrics logged - Loss: {self.score[0]:.4f}, Accuracy: {self.score[1]:.4f}")
 
                 # Log model - always log for DagsHub
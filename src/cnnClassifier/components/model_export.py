@@ -0,0 +1,97 @@
+import os
+import shutil
+import numpy as np
+import tensorflow as tf
+from pathlib import Path
+from contextlib import contextmanager
+from cnnClassifier import logger
+from cnnClassifier.entity.config_entity import ModelExportConfig
+from cnnClassifier.components.data_pipeline import build_loader
+from cnnClassifier.pipeline.tflite_backend import TFLiteModel
+from cnnClassifier.utils.common import save_json
+
+
+class ModelExport:
+    def __init__(self, config: ModelExportConfig):
+        self.config = config
+
+    @contextmanager
+    def _valid_dataset(self):
+        """Same 30% validation split the evaluation stage scores on, open until the block exits"""
+        with build_loader(
+            self.config.params_data_loader,
+            training_data=self.config.training_data,
+            dataset_cache_dir=self.config.dataset_cache_dir,
+            source_zip=self.config.source_zip,
+            image_size=self.config.params_image_size,
+            batch_size=self.config.params_batch_size,
+            validation_split=0.30
+        ) as loader:
+            dataset, _ = loader.dataset(subset="validation", shuffle=False)
+            yield dataset
+
+    def _representative_dataset(self, num_batches: int = 10):
+        with self._valid_dataset() as dataset:
+            for images, _ in dataset.take(num_batches):
+                for image in images:
+                    yield [tf.expand_dims(image, 0)]
+
+    def convert(self):
+        """Convert the trained Keras model to TFLite with the configured quantization"""
+        quantization = self.config.params_quantization
+        if quantization not in ("none", "dynamic_range", "int8"):
+            raise ValueError(f"Unknown QUANTIZATION: {quantization}")
+
+        model = tf.keras.models.load_model(self.config.model_path)
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        if quantization != "none":
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if quantization == "int8":
+            # Integer kernels inside, float32 input/output so serving code stays the same
+            converter.representative_dataset = self._representative_dataset
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+        tflite_model = converter.convert()
+        with open(self.config.tflite_model_path, "wb") as f:
+            f.write(tflite_model)
+        logger.info(f"TFLite model ({quantization}) saved at: {self.config.tflite_model_path}")
+
+    def evaluate(self) -> dict:
+        """Accuracy of the Keras and the exported model, both on the same batches of the evaluation split
+
+        Scores from the evaluation stage are not reused: the delta is only meaningful
+        when both models see exactly the same images, in the same float32 precision.
+        """
+        keras_model = tf.keras.models.load_model(self.config.model_path)
+        tflite_model = TFLiteModel(self.config.tflite_model_path)
+        keras_correct, tflite_correct, total = 0, 0, 0
+        with self._valid_dataset() as dataset:
+            for images, labels in dataset:
+                images, labels = images.numpy(), np.argmax(labels.numpy(), axis=1)
+                keras_correct += int(np.sum(np.argmax(keras_model.predict_on_batch(images), axis=1) == labels))
+                tflite_correct += int(np.sum(np.argmax(tflite_model.predict(images), axis=1) == labels))
+                total += len(labels)
+        if not total:
+            raise ValueError("The evaluation split is empty")
+        return {"keras_accuracy": keras_correct / total, "tflite_accuracy": tflite_correct / total}
+
+    def save_report(self, accuracies: dict):
+        report = {
+            "quantization": self.config.params_quantization,
+            "tflite_accuracy": accuracies["tflite_accuracy"],
+            "keras_accuracy": accuracies["keras_accuracy"],
+            "accuracy_delta": accuracies["tflite_accuracy"] - accuracies["keras_accuracy"],
+            "keras_model_mb": round(os.path.getsize(self.config.model_path) / 2**20, 2),
+            "tflite_model_mb": round(os.path.getsize(self.config.tflite_model_path) / 2**20, 2),
+        }
+        save_json(path=Path(self.config.report_path), data=report)
+
+    def publish(self):
+        """Copy the exported model to where the tflite serving backend loads it"""
+        target = Path(self.config.serving_model_path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_suffix(".tmp")
+        shutil.copyfile(self.config.tflite_model_path, tmp_path)
+        # Atomic, so a server reloading on the mtime change never reads a half-written file
+        os.replace(tmp_path, target)
+        logger.info(f"TFLite model published to: {target}")
@@ -1,40 +1,233 @@
 import os
+import json
+import shutil
 import urllib.request as request
 from zipfile import ZipFile
 import tensorflow as tf
 import time
 from pathlib import Path
 from cnnClassifier.entity.config_entity import TrainingConfig
-tf.config.run_functions_eagerly(True)
+from cnnClassifier.utils.preprocessing import ImagePreprocessor
+from cnnClassifier.components.data_pipeline import build_loader
+from cnnClassifier.components.feature_extraction import (BottleneckFeatureCache, split_backbone_head,
+                                                         feature_dataset, data_fingerprint)
+from cnnClassifier.utils.common import save_json, load_json
+from cnnClassifier.utils.cpu_profile import apply_cpu_profile, with_dtype_policy, save_profile_report
+from cnnClassifier.utils.distributed import (is_multi_worker, create_strategy, worker_index, is_chief,
+                                             worker_save_path, broadcast_from_chief)
+from cnnClassifier import logger
+
+
+class ThroughputCallback(tf.keras.callbacks.Callback):
+    """Measures training steps/sec per epoch, excluding validation time"""
+
+    def __init__(self):
+        super().__init__()
+        self._supports_tf_logs = True
+        self.epoch_steps_per_sec = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._epoch_start = time.perf_counter()
+        self._last_batch_end = self._epoch_start
+        self._steps = 0
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._last_batch_end = time.perf_counter()
+        self._steps += 1
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = self._last_batch_end - self._epoch_start
+        if self._steps and elapsed > 0:
+            self.epoch_steps_per_sec.append(self._steps / elapsed)
+            logger.info(f"Epoch {epoch + 1}: {self.epoch_steps_per_sec[-1]:.2f} steps/sec")
+
+    @property
+    def steps_per_sec(self) -> float:
+        # The first epoch pays for tracing/compilation; report steady state when there is one
+        epochs = self.epoch_steps_per_sec[1:] or self.epoch_steps_per_sec
+        return sum(epochs) / len(epochs) if epochs else 0.0
+
+
+class BestModelCallback(tf.keras.callbacks.Callback):
+    """Keeps the weights of the epoch with the lowest val_loss and stops after `patience` epochs without improvement.
+
+    The best loss and the patience count live in a JSON file next to the
+    checkpoints, so a resumed run carries on with them instead of starting over.
+    """
+
+    def __init__(self, state_path: Path, weights_dir: Path, patience: int = 0, resume: bool = False):
+        super().__init__()
+        self.state_path = Path(state_path)
+        self.weights_dir = Path(weights_dir)
+        self.patience = patience
+        self.state = json.loads(self.state_path.read_text()) if resume and self.state_path.exists() else {}
+        self.state.setdefault("best_val_loss", None)
+        self.state.setdefault("best_epoch", None)
+        self.state.setdefault("wait", 0)
+        self.state.setdefault("epoch", 0)
+        self.state.setdefault("previous", None)
+
+    def _weights_path(self, epoch) -> Path:
+        return self.weights_dir / f"epoch_{epoch}.weights.h5"
+
+    @property
+    def best_weights_path(self) -> Path:
+        return self._weights_path(self.state["best_epoch"])
+
+    def on_epoch_end(self, epoch, logs=None):
+        val_loss = (logs or {}).get("val_loss")
+        if val_loss is None:
+            return
+        # The state is saved before BackupAndRestore's backup of the same epoch; if the run died in between,
+        # the resumed run repeats that epoch, and it must not be counted twice
+        if epoch + 1 <= self.state["epoch"] and self.state["previous"] is not None:
+            self.state = self.state["previous"]
+        previous = dict(self.state, previous=None)
+
+        best = self.state["best_val_loss"]
+        if best is None or val_loss < best:
+            self.state.update(best_val_loss=float(val_loss), best_epoch=epoch + 1, wait=0)
+            self.weights_dir.mkdir(parents=True, exist_ok=True)
+            self.model.save_weights(self.best_weights_path)
+        else:
+            self.state["wait"] += 1
+        self.state.update(epoch=epoch + 1, previous=previous)
+        if is_chief():
+            temp_path = self.state_path.with_suffix(".tmp")
+            temp_path.write_text(json.dumps(self.state))
+            os.replace(temp_path, self.state_path)
+        # Keep the weights of the best epoch and of the one the state would roll back to
+        keep = {self.best_weights_path, self._weights_path(previous["best_epoch"])}
+        for path in self.weights_dir.glob("epoch_*.weights.h5"):
+            if path not in keep:
+                path.unlink(missing_ok=True)
+
+        if self.patience and self.state["wait"] >= self.patience:
+            logger.info(f"val_loss has not improved for {self.patience} epochs, stopping after epoch {epoch + 1} "
+                        f"(best {self.state['best_val_loss']:.4f} at epoch {self.state['best_epoch']})")
+            self.model.stop_training = True
 
-from cnnClassifier.entity.config_entity import TrainingConfig
-from pathlib import Path
 
 class Training:
     def __init__(self, config: TrainingConfig):
         self.config = config
+        # Threads and dtype policy must be in place before any model is built
+        self.cpu_settings = apply_cpu_profile(config.cpu_profile)
+        # The strategy has to exist before any other TensorFlow op
+        self.distributed = is_multi_worker(config.distributed)
+        self.strategy = create_strategy(config.distributed)
+        self.worker_index, self.num_workers = worker_index() if self.distributed else (0, 1)
+        self.loaders = []
 
-    def get_base_model(self):
-        self.model = tf.keras.models.load_model(
-            self.config.updated_base_model_path
-        )
-        self.model.compile(
-            optimizer='adam',
-            loss='categorical_crossentropy',  
-            metrics=['accuracy']
+    @property
+    def execution_mode(self) -> str:
+        if self.config.params_run_eagerly:
+            mode = "eager"
+        else:
+            mode = "xla" if self.config.params_jit_compile else "graph"
+        if self.config.params_training_mode == "feature_extraction" and not self.config.params_is_augmentation:
+            mode += "+feature_extraction"
+        if self.config.cpu_profile.name != "default":
+            mode += f"+cpu_{self.config.cpu_profile.name}"
+        if self.distributed:
+            mode += f"+multi_worker{self.num_workers}"
+        return mode
+
+    def _run_key(self) -> dict:
+        """What a checkpoint has to match to be resumed: the starting model and the inputs that shape training"""
+        base_model = os.stat(self.config.updated_base_model_path)
+        return {
+            "base_model": [base_model.st_size, base_model.st_mtime_ns],
+            "image_size": list(self.config.params_image_size),
+            "batch_size": self.config.params_batch_size,
+            "data_loader": self.config.params_data_loader,
+            "training_mode": self.config.params_training_mode,
+            "augmentation": self.config.params_is_augmentation,
+            "workers": self.num_workers,
+        }
+
+    def checkpoint_callbacks(self) -> list:
+        """Per-epoch backup with automatic resume, best-weights tracking and early stopping
+
+        A leftover backup from an interrupted run is resumed only if it was made
+        for the same starting model and inputs; otherwise it is discarded.
+        """
+        checkpoint_dir = Path(self.config.checkpoint_dir)
+        backup_dir = checkpoint_dir / "backup"
+        run_key_path = checkpoint_dir / "run_key.json"
+        run_key = self._run_key()
+
+        resumable = backup_dir.is_dir() and any(backup_dir.iterdir())
+        resume = resumable and run_key_path.exists() and json.loads(run_key_path.read_text()) == run_key
+        # Workers follow the chief's decision, made before anyone removes anything
+        resume = bool(broadcast_from_chief(self.strategy, resume))
+        if resume:
+            logger.info(f"Resuming training from the checkpoint in {backup_dir}")
+        elif is_chief():
+            if resumable:
+                logger.warning(f"Discarding the checkpoint in {backup_dir}, it was made for other inputs")
+            shutil.rmtree(checkpoint_dir, ignore_errors=True)
+            checkpoint_dir.mkdir(parents=True, exist_ok=True)
+            run_key_path.write_text(json.dumps(run_key))
+        # and none reaches fit(), where BackupAndRestore looks for a backup, before the chief has cleared it
+        broadcast_from_chief(self.strategy)
+
+        self.best_model = BestModelCallback(
+            state_path=checkpoint_dir / "best.json",
+            weights_dir=worker_save_path(checkpoint_dir / "best", self.config.distributed_dir),
+            patience=self.config.params_early_stopping_patience,
+            resume=resume
         )
+        # BackupAndRestore saves weights, optimizer state and the epoch, restores them when fit()
+        # starts again after a failure, and deletes the backup once fit() completes
+        return [self.best_model, tf.keras.callbacks.BackupAndRestore(backup_dir=str(backup_dir))]
+
+    def restore_best_weights(self, model):
+        """Load the best epoch's weights into `model` and clear the checkpoints of the finished run"""
+        if self.best_model.state["best_epoch"] is not None and self.best_model.best_weights_path.exists():
+            model.load_weights(self.best_model.best_weights_path)
+            logger.info(f"Restored the weights of epoch {self.best_model.state['best_epoch']} "
+                        f"(val_loss {self.best_model.state['best_val_loss']:.4f})")
+        if is_chief():
+            shutil.rmtree(self.config.checkpoint_dir, ignore_errors=True)
+        else:
+            shutil.rmtree(self.best_model.weights_dir, ignore_errors=True)
+
+    @property
+    def global_batch_size(self) -> int:
+        # BATCH_SIZE is per worker, as for a single process
+        return self.config.params_batch_size * self.num_workers
+
+    def get_base_model(self):
+        # Variables created in the strategy scope are mirrored across workers
+        with self.strategy.scope():
+            self.model = tf.keras.models.load_model(
+                self.config.updated_base_model_path
+            )
+            if self.cpu_settings["mixed_bfloat16"]:
+                self.model = with_dtype_policy(self.model, "mixed_bfloat16")
+            # Compiled graph mode by default; RUN_EAGERLY is a debugging switch only
+            self.model.compile(
+                optimizer='adam',
+                loss='categorical_crossentropy',
+                metrics=['accuracy'],
+                run_eagerly=self.config.params_run_eagerly,
+                jit_compile=self.config.params_jit_compile
+            )
 
     def train_valid_generator(self):  
-        datagenerator_kwargs = dict(
-            rescale=1. / 255,
-            validation_split=0.20
-        )
+        if self.config.params_data_loader in ("tf_data", "cache", "zip"):
+            return self.train_valid_dataset()
+        if self.distributed and self.config.params_data_loader == "keras":
+            # ImageDataGenerator cannot be sharded; the tf.data loader reads the same files
+            logger.warning("DATA_LOADER keras cannot be sharded across workers, using tf_data")
+            return self.train_valid_dataset()
+        if self.config.params_data_loader != "keras":
+            raise ValueError(f"Unknown DATA_LOADER: {self.config.params_data_loader}")
 
-        dataflow_kwargs = dict(
-            target_size=self.config.params_image_size[:-1],
-            batch_size=self.config.params_batch_size,
-            interpolation="bilinear"
-        )
+        preprocessor = ImagePreprocessor(self.config.params_image_size)
+        datagenerator_kwargs = preprocessor.datagenerator_kwargs(validation_split=0.20)
+        dataflow_kwargs = preprocessor.dataflow_kwargs(batch_size=self.config.params_batch_size)
 
         valid_datagenerator = tf.keras.preprocessing.image.ImageDataGenerator(
             **datagenerator_kwargs
@@ -66,29 +259,181 @@ class Training:
             shuffle=True,
             **dataflow_kwargs
         )
+        self.train_samples = self.train_generator.samples
+        self.valid_samples = self.valid_generator.samples
+
+    def _dataset_loader(self, validation_split: float = 0.20, batch_size: int = None):
+        loader = build_loader(
+            self.config.params_data_loader,
+            training_data=self.config.training_data,
+            dataset_cache_dir=self.config.dataset_cache_dir,
+            source_zip=self.config.source_zip,
+            image_size=self.config.params_image_size,
+            batch_size=batch_size or self.config.params_batch_size,
+            validation_split=validation_split
+        )
+        self.loaders.append(loader)
+        return loader
+
+    def close_loaders(self):
+        """Close the loaders behind the training datasets (e.g. the dataset zip) once training is done"""
+        while self.loaders:
+            self.loaders.pop().close()
+
+    def train_valid_dataset(self):
+        shard = None
+        if self.distributed:
+            # Each worker reads only its own files. Its batches are global-sized because
+            # Keras splits every batch across all replicas, so a worker still takes
+            # BATCH_SIZE of its own images per step
+            shard = (self.num_workers, self.worker_index)
+        loader = self._dataset_loader(batch_size=self.global_batch_size)
+        valid_dataset, self.valid_samples = loader.dataset(
+            subset="validation",
+            shuffle=False,
+            shard=shard
+        )
+        train_dataset, self.train_samples = loader.dataset(
+            subset="training",
+            shuffle=True,
+            augment=self.config.params_is_augmentation,
+            shard=shard
+        )
+        # fit() is driven by steps_per_epoch, so the training stream must not run dry between epochs
+        self.train_generator = train_dataset.repeat()
+        self.valid_generator = valid_dataset
+        if self.distributed:
+            options = tf.data.Options()
+            options.experimental_distribute.auto_shard_policy = tf.data.experimental.AutoShardPolicy.OFF
+            self.train_generator = self.train_generator.with_options(options)
+            self.valid_generator = self.valid_generator.with_options(options)
+
+    @property
+    def uses_feature_extraction(self) -> bool:
+        if self.config.params_training_mode != "feature_extraction":
+            return False
+        if self.config.params_is_augmentation:
+            # Augmented images change every epoch, so backbone outputs cannot be reused
+            logger.warning("TRAINING_MODE feature_extraction needs AUGMENTATION: False, training the full model instead")
+            return False
+        if self.distributed:
+            logger.warning("TRAINING_MODE feature_extraction runs in a single process, training the full model instead")
+            return False
+        return True
+
+    def train_head(self):
+        """Run the frozen backbone once, then fit only the classifier head on cached features"""
+        backbone, head = split_backbone_head(self.model)
+        loader = self._dataset_loader()
+        feature_cache = BottleneckFeatureCache(
+            root_dir=self.config.features_dir,
+            backbone=backbone,
+            base_model_path=self.config.updated_base_model_path,
+            data_key=data_fingerprint(loader)
+        )
+
+        train_images, self.train_samples = loader.dataset(subset="training", shuffle=False)
+        valid_images, self.valid_samples = loader.dataset(subset="validation", shuffle=False)
+        train_features, train_labels = feature_cache.features("training", train_images, self.train_samples)
+        valid_features, valid_labels = feature_cache.features("validation", valid_images, self.valid_samples)
+
+        print("Training samples:", self.train_samples)
+        print("Validation samples:", self.valid_samples)
+
+        head.compile(
+            optimizer='adam',
+            loss='categorical_crossentropy',
+            metrics=['accuracy'],
+            run_eagerly=self.config.params_run_eagerly,
+            jit_compile=self.config.params_jit_compile
+        )
+        throughput = ThroughputCallback()
+        history = head.fit(
+            feature_dataset(train_features, train_labels, self.config.params_batch_size, shuffle=True),
+            epochs=self.config.params_epochs,
+            validation_data=feature_dataset(valid_features, valid_labels, self.config.params_batch_size, shuffle=False),
+            callbacks=[throughput] + self.checkpoint_callbacks()
+        )
+        self.restore_best_weights(head)
+
+        # The head shares its layers with self.model, which now carries the trained weights
+        self.save_model(
+            path=self.config.trained_model_path,
+            model=self._model_for_saving()
+        )
+        self.save_throughput(throughput.steps_per_sec)
+        self.save_profile_metrics(throughput.steps_per_sec, history)
 
     def train(self):
-        self.steps_per_epoch = max(1, self.train_generator.samples // self.train_generator.batch_size)
-        self.validation_steps = max(1, self.valid_generator.samples // self.valid_generator.batch_size)
+        if self.uses_feature_extraction:
+            return self.train_head()
+
+        self.steps_per_epoch = max(1, self.train_samples // self.config.params_batch_size)
+        self.validation_steps = max(1, self.valid_samples // self.config.params_batch_size)
 
-        print("Training samples:", self.train_generator.samples)
-        print("Validation samples:", self.valid_generator.samples)
+        print("Training samples:", self.train_samples * self.num_workers)
+        print("Validation samples:", self.valid_samples * self.num_workers)
         print("Steps per epoch:", self.steps_per_epoch)
         print("Validation steps:", self.validation_steps)
 
-        self.model.fit(
+        throughput = ThroughputCallback()
+        history = self.model.fit(
             self.train_generator,
             epochs=self.config.params_epochs,
             steps_per_epoch=self.steps_per_epoch,
             validation_steps=self.validation_steps,
-            validation_data=self.valid_generator
+            validation_data=self.valid_generator,
+            callbacks=[throughput] + self.checkpoint_callbacks()
         )
+        self.restore_best_weights(self.model)
 
-        self.save_model(
-            path=self.config.trained_model_path,
-            model=self.model
+        # Every worker saves (the chief to model.h5, the others to scratch files) ...
+        save_path = worker_save_path(self.config.trained_model_path, self.config.distributed_dir)
+        save_path.parent.mkdir(parents=True, exist_ok=True)
+        self.save_model(path=save_path, model=self._model_for_saving())
+        if not is_chief():
+            save_path.unlink(missing_ok=True)
+            return
+        # ... and only the chief writes the reports
+        self.save_throughput(throughput.steps_per_sec)
+        self.save_profile_metrics(throughput.steps_per_sec, history)
+
+    def _model_for_saving(self):
+        # model.h5 stays float32 so evaluation, export and serving do not depend on the training CPU
+        if self.cpu_settings["mixed_bfloat16"]:
+            with self.strategy.scope():
+                return with_dtype_policy(self.model, "float32")
+        return self.model
+
+    def save_profile_metrics(self, steps_per_sec: float, history):
+        val_accuracy = history.history.get("val_accuracy") or [None]
+        save_profile_report(
+            self.config.cpu_profile_report_path,
+            self.config.cpu_profile,
+            self.cpu_settings,
+            train_images_per_sec=round(steps_per_sec * self.global_batch_size, 2),
+            val_accuracy=val_accuracy[-1]
         )
 
+    def save_throughput(self, steps_per_sec: float):
+        """Record steps/sec for the current execution mode next to the other modes' last runs"""
+        path = Path(self.config.throughput_report_path)
+        report = dict(load_json(path)) if path.exists() else {}
+        report[self.execution_mode] = {
+            "steps_per_sec": round(steps_per_sec, 4),
+            "images_per_sec": round(steps_per_sec * self.global_batch_size, 2),
+            "batch_size": self.config.params_batch_size,
+            "workers": self.num_workers,
+            "data_loader": self.config.params_data_loader
+        }
+        baseline = report.get("eager", {}).get("steps_per_sec")
+        for mode, result in report.items():
+            if baseline and isinstance(result, dict) and "steps_per_sec" in result:
+                result["speedup_vs_eager"] = round(result["steps_per_sec"] / baseline, 2)
+
+        save_json(path=path, data=report)
+        logger.info(f"Training throughput ({self.execution_mode}): {steps_per_sec:.2f} steps/sec")
+
     @staticmethod
     def save_model(path: Path, model: tf.keras.Model):
         model.save(path)
@@ -0,0 +1,140 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from cnnClassifier import logger
+
+
+# Keras clips probabilities the same way in categorical_crossentropy
+EPSILON = 1e-7
+
+
+class StreamingMetrics:
+    """Classification metrics accumulated one batch at a time, in memory independent of the number of images.
+
+    Keeps a confusion matrix, the summed loss and, per class, histograms of
+    that class's predicted probability for positive and negative images.
+    ROC-AUC (one-vs-rest) is computed from the histograms, so it is exact up
+    to ties within one bin of width 1 / roc_bins.
+    """
+
+    def __init__(self, class_names, roc_bins: int = 1000):
+        self.class_names = list(class_names)
+        self.roc_bins = roc_bins
+        num_classes = len(self.class_names)
+        self.confusion = np.zeros((num_classes, num_classes), dtype=np.int64)  # rows: true, columns: predicted
+        self.positive_hist = np.zeros((num_classes, roc_bins), dtype=np.int64)
+        self.negative_hist = np.zeros((num_classes, roc_bins), dtype=np.int64)
+        self.loss_sum = 0.0
+        self.samples = 0
+
+    def update(self, labels, probabilities):
+        """Add one batch; labels are class indices or one-hot rows, probabilities the softmax outputs"""
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        labels = np.asarray(labels)
+        if labels.ndim > 1:
+            labels = labels.argmax(axis=1)
+        labels = labels.astype(np.int64)
+        num_classes = len(self.class_names)
+
+        predicted = probabilities.argmax(axis=1)
+        self.confusion += np.bincount(
+            labels * num_classes + predicted, minlength=num_classes * num_classes
+        ).reshape(num_classes, num_classes)
+
+        true_probability = np.clip(probabilities[np.arange(len(labels)), labels], EPSILON, 1 - EPSILON)
+        self.loss_sum += float(-np.log(true_probability).sum())
+
+        bins = np.clip((probabilities * self.roc_bins).astype(np.int64), 0, self.roc_bins - 1)
+        for c in range(num_classes):
+            positive = labels == c
+            self.positive_hist[c] += np.bincount(bins[positive, c], minlength=self.roc_bins)
+            self.negative_hist[c] += np.bincount(bins[~positive, c], minlength=self.roc_bins)
+        self.samples += len(labels)
+
+    def roc_auc(self, class_index: int):
+        """One-vs-rest ROC-AUC of a class, None if the data has no positives or no negatives for it"""
+        # Sweep the threshold from the highest score down
+        positive = self.positive_hist[class_index][::-1]
+        negative = self.negative_hist[class_index][::-1]
+        if not positive.sum() or not negative.sum():
+            return None
+        tpr = np.concatenate([[0], np.cumsum(positive)]) / positive.sum()
+        fpr = np.concatenate([[0], np.cumsum(negative)]) / negative.sum()
+        # Trapezoids count the pairs tied within a bin as half right
+        return float(np.sum((fpr[1:] - fpr[:-1]) * (tpr[1:] + tpr[:-1]) / 2))
+
+    def result(self) -> dict:
+        if not self.samples:
+            raise ValueError("No images were evaluated")
+        true_positives = np.diag(self.confusion)
+        predicted_totals = self.confusion.sum(axis=0)
+        support = self.confusion.sum(axis=1)
+
+        per_class = {}
+        for c, name in enumerate(self.class_names):
+            precision = true_positives[c] / predicted_totals[c] if predicted_totals[c] else None
+            recall = true_positives[c] / support[c] if support[c] else None
+            if precision is None or recall is None:
+                f1 = None
+            else:
+                f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+            auc = self.roc_auc(c)
+            per_class[name] = {
+                "precision": None if precision is None else round(float(precision), 4),
+                "recall": None if recall is None else round(float(recall), 4),
+                "f1": None if f1 is None else round(float(f1), 4),
+                "roc_auc": None if auc is None else round(auc, 4),
+                "support": int(support[c]),
+            }
+
+        aucs = [m["roc_auc"] for m in per_class.values() if m["roc_auc"] is not None]
+        return {
+            "loss": self.loss_sum / self.samples,
+            "accuracy": float(true_positives.sum() / self.samples),
+            "macro_roc_auc": round(float(np.mean(aucs)), 4) if aucs else None,
+            "samples": self.samples,
+            "class_names": self.class_names,
+            "confusion_matrix": self.confusion.tolist(),
+            "per_class": per_class,
+        }
+
+
+def prefetch_batches(sequence, workers: int = 4, queue_size: int = 8):
+    """Yield sequence[0], sequence[1], ... in order while worker threads load up to queue_size batches ahead
+
+    For indexable batch sources such as Keras' DirectoryIterator, which
+    otherwise load each batch on the calling thread between predictions.
+    """
+    indices = iter(range(len(sequence)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(sequence.__getitem__, i) for _, i in zip(range(queue_size), indices))
+        while pending:
+            batch = pending.popleft().result()
+            index = next(indices, None)
+            if index is not None:
+                pending.append(pool.submit(sequence.__getitem__, index))
+            yield batch
+
+
+def evaluate_stream(predict_batch, batches, metrics: StreamingMetrics, log_every: int = 50) -> dict:
+    """Predict each (images, labels) batch and fold it into `metrics`; nothing per image is kept
+
+    The input pipeline should prefetch, so decoding the next batch overlaps
+    with inference on the current one.
+
+    Returns:
+        dict: metrics.result() plus wall time and images/sec over the whole stream
+    """
+    start = time.perf_counter()
+    for step, (images, labels) in enumerate(batches, 1):
+        metrics.update(labels, predict_batch(images))
+        if step % log_every == 0:
+            logger.info(f"Evaluated {metrics.samples} images, "
+                        f"{metrics.samples / (time.perf_counter() - start):.1f} images/sec")
+    elapsed = time.perf_counter() - start
+
+    result = metrics.result()
+    result["seconds"] = round(elapsed, 3)
+    result["images_per_sec"] = round(metrics.samples / elapsed, 2) if elapsed > 0 else None
+    return result
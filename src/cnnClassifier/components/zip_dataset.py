@@ -0,0 +1,75 @@
+import mmap
+import zipfile
+import posixpath
+from cnnClassifier.utils.common import IMAGE_EXTENSIONS, split_range
+
+
+class _MappedFile:
+    """mmap as a zipfile source; mmap only gained seekable() in Python 3.13"""
+
+    def __init__(self, mapped: mmap.mmap):
+        self._mmap = mapped
+
+    def seekable(self) -> bool:
+        return True
+
+    def __getattr__(self, name):
+        return getattr(self._mmap, name)
+
+
+class ZipImageDataset:
+    """Class-per-directory image dataset read straight from a zip archive.
+
+    Classes and members come from the archive's central directory, and member
+    bytes are decompressed on demand from a memory-mapped view of the file, so
+    the dataset never has to be extracted to disk.
+    """
+
+    def __init__(self, zip_path, root: str = ""):
+        self.zip_path = str(zip_path)
+        self.root = root.strip("/")
+        self._file = open(self.zip_path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._archive = zipfile.ZipFile(_MappedFile(self._mmap))
+        self.class_names, self.class_members = self._index()
+
+    def _index(self):
+        prefix = f"{self.root}/" if self.root else ""
+        members = {}
+        for info in self._archive.infolist():
+            name = info.filename
+            if info.is_dir() or not name.startswith(prefix) or not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            relative = name[len(prefix):]
+            if "/" not in relative:
+                continue
+            class_name = relative.split("/", 1)[0]
+            members.setdefault(class_name, []).append(name)
+
+        if not members:
+            raise ValueError(f"No class directories with images under '{self.root}/' in {self.zip_path}")
+
+        # Same ordering flow_from_directory would see after extraction
+        class_names = sorted(members)
+        class_members = [
+            sorted(members[c], key=lambda n: (posixpath.dirname(n), posixpath.basename(n)))
+            for c in class_names
+        ]
+        return class_names, class_members
+
+    def list_members(self, validation_split: float, subset: str):
+        """Member names and labels of a subset, split per class like flow_from_directory"""
+        names, labels = [], []
+        for label, members in enumerate(self.class_members):
+            selected = [members[i] for i in split_range(len(members), validation_split, subset)]
+            names.extend(selected)
+            labels.extend([label] * len(selected))
+        return names, labels
+
+    def read(self, name: str) -> bytes:
+        return self._archive.read(name)
+
+    def close(self):
+        self._archive.close()
+        self._mmap.close()
+        self._file.close()
@@ -1,39 +1,169 @@
 from cnnClassifier.constants import * 
 from cnnClassifier.utils.common import read_yaml, create_directories
-from cnnClassifier.entity.config_entity import (DataIngestionConfig,PrepareBaseModelConfig,TrainingConfig,EvaluationConfig)
+from cnnClassifier.entity.config_entity import (DataIngestionConfig,DatasetCacheConfig,PrepareBaseModelConfig,TrainingConfig,EvaluationConfig,ModelExportConfig,ServingConfig,CpuProfileConfig,DistributedConfig)
+from box import ConfigBox
+import functools
+import threading
 import os 
 
+
+# Process-wide caches shared by every ConfigurationManager: parsed YAML keyed on
+# (resolved path, mtime), and the config entities built from it
+_cache_lock = threading.Lock()
+_yaml_cache = {}
+_entity_cache = {}
+
+
+def _load_yaml(path) -> tuple:
+    """Return (frozen ConfigBox, cache key); the file is parsed again only after it changes"""
+    resolved = str(Path(path).resolve())
+    mtime = os.stat(resolved).st_mtime_ns
+    with _cache_lock:
+        cached = _yaml_cache.get(resolved)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], (resolved, mtime)
+
+    content = ConfigBox(read_yaml(Path(path)).to_dict(), frozen_box=True)
+    with _cache_lock:
+        _yaml_cache[resolved] = (mtime, content)
+        # Entities built from an older version of this file can never be hit again
+        for key in [k for k in _entity_cache if any(part[0] == resolved for part in k[1:])]:
+            del _entity_cache[key]
+    return content, (resolved, mtime)
+
+
+def find_config_files(fallback_dir) -> tuple:
+    """(config, params) paths: the working directory's if it has them, else the ones under fallback_dir"""
+    if CONFIG_FILE_PATH.is_file() and PARAMS_FILE_PATH.is_file():
+        return CONFIG_FILE_PATH, PARAMS_FILE_PATH
+    return Path(fallback_dir) / CONFIG_FILE_PATH, Path(fallback_dir) / PARAMS_FILE_PATH
+
+
+def clear_config_cache():
+    with _cache_lock:
+        _yaml_cache.clear()
+        _entity_cache.clear()
+
+
+def _cached_entity(getter):
+    """Build a config entity (and its directories) once per config/params version"""
+    @functools.wraps(getter)
+    def wrapper(self):
+        key = ((getter.__name__, self.create_dirs), self._config_key, self._params_key)
+        with _cache_lock:
+            entity = _entity_cache.get(key)
+        if entity is None:
+            entity = getter(self)
+            with _cache_lock:
+                _entity_cache[key] = entity
+        return entity
+    return wrapper
+
+
 class ConfigurationManager:
     def __init__(
         self,
         config_filepath = CONFIG_FILE_PATH,
-        params_filepath = PARAMS_FILE_PATH):
+        params_filepath = PARAMS_FILE_PATH,
+        create_dirs: bool = True):
+
+        # Cached and read-only; every stage pipeline builds its own manager
+        self.config, self._config_key = _load_yaml(config_filepath)
+        self.params, self._params_key = _load_yaml(params_filepath)
+        # False only reads the config, e.g. to fingerprint stages that may be skipped
+        self.create_dirs = create_dirs
+
+        # The directory holding config/, which relative serving paths are resolved against
+        self.project_dir = Path(self._config_key[0]).parent.parent
 
-        self.config = read_yaml(config_filepath)
-        self.params = read_yaml(params_filepath)
+        artifacts_root = self._project_path(self.config.artifacts_root)
+        if not os.path.isdir(artifacts_root):
+            self._create_directories([artifacts_root])
 
-        create_directories([self.config.artifacts_root])
+    def _project_path(self, path) -> Path:
+        return Path(path) if Path(path).is_absolute() else self.project_dir / path
+
+    def _create_directories(self, paths: list):
+        if self.create_dirs:
+            create_directories(paths)
 
 
     
+    @_cached_entity
+    def get_cpu_profile_config(self) -> CpuProfileConfig:
+        name = self.params.CPU_PROFILE
+        if name not in self.params.CPU_PROFILES:
+            raise ValueError(f"CPU_PROFILE {name} is not one of CPU_PROFILES: {list(self.params.CPU_PROFILES)}")
+        profile = self.params.CPU_PROFILES[name]
+        for key in ("intra_op_threads", "inter_op_threads"):
+            value = profile[key]
+            if value != "physical" and (type(value) is not int or value < 0):
+                raise ValueError(f"CPU_PROFILES.{name}.{key} must be a thread count >= 0 or 'physical', got {value!r}")
+
+        cpu_profile_config = CpuProfileConfig(
+            name=name,
+            intra_op_threads=profile.intra_op_threads,
+            inter_op_threads=profile.inter_op_threads,
+            onednn=profile.onednn,
+            mixed_bfloat16=profile.mixed_bfloat16
+        )
+
+        return cpu_profile_config
+
+    @_cached_entity
+    def get_distributed_config(self) -> DistributedConfig:
+        params = self.params.DISTRIBUTED
+        if params.strategy not in ("none", "multi_worker"):
+            raise ValueError(f"Unknown DISTRIBUTED strategy: {params.strategy}")
+
+        distributed_config = DistributedConfig(
+            strategy=params.strategy,
+            local_workers=params.local_workers,
+            port=params.port,
+            timeout_s=params.timeout_s
+        )
+
+        return distributed_config
+
+    @_cached_entity
     def get_data_ingestion_config(self) -> DataIngestionConfig:
         config = self.config.data_ingestion
 
-        create_directories([config.root_dir])
+        self._create_directories([config.root_dir])
 
         data_ingestion_config = DataIngestionConfig(
             root_dir=config.root_dir,
             source_URL=config.source_URL,
             local_data_file=config.local_data_file,
-            unzip_dir=config.unzip_dir 
+            unzip_dir=config.unzip_dir,
+            source_sha256=config.source_sha256,
+            extract_workers=config.extract_workers,
+            params_data_loader=self.params.DATA_LOADER
         )
 
         return data_ingestion_config
     
+    @_cached_entity
+    def get_dataset_cache_config(self) -> DatasetCacheConfig:
+        config = self.config.dataset_cache
+
+        self._create_directories([config.root_dir])
+
+        dataset_cache_config = DatasetCacheConfig(
+            root_dir=Path(config.root_dir),
+            source_dir=Path(config.source_dir),
+            num_workers=config.num_workers,
+            params_image_size=self.params.IMAGE_SIZE,
+            params_data_loader=self.params.DATA_LOADER
+        )
+
+        return dataset_cache_config
+
+    @_cached_entity
     def get_prepare_base_model_config(self) -> PrepareBaseModelConfig:
         config = self.config.prepare_base_model
         
-        create_directories([config.root_dir])
+        self._create_directories([config.root_dir])
 
         prepare_base_model_config = PrepareBaseModelConfig(
             root_dir=Path(config.root_dir),
@@ -48,12 +178,15 @@ class ConfigurationManager:
 
         return prepare_base_model_config
     
+    @_cached_entity
     def get_training_config(self) -> TrainingConfig:
         training = self.config.training
         prepare_base_model = self.config.prepare_base_model
         params = self.params
+        if params.RUN_EAGERLY and params.JIT_COMPILE:
+            raise ValueError("RUN_EAGERLY and JIT_COMPILE cannot both be True: eager execution skips XLA compilation")
         training_data = os.path.join(self.config.data_ingestion.unzip_dir, "kidney-ct-scan-image")
-        create_directories([
+        self._create_directories([
             Path(training.root_dir)
         ])
 
@@ -65,22 +198,87 @@ class ConfigurationManager:
             params_epochs=params.EPOCHS,
             params_batch_size=params.BATCH_SIZE,
             params_is_augmentation=params.AUGMENTATION,
-            params_image_size=params.IMAGE_SIZE
+            params_image_size=params.IMAGE_SIZE,
+            params_data_loader=params.DATA_LOADER,
+            params_run_eagerly=params.RUN_EAGERLY,
+            params_jit_compile=params.JIT_COMPILE,
+            throughput_report_path=Path(training.throughput_report),
+            dataset_cache_dir=Path(self.config.dataset_cache.root_dir),
+            params_training_mode=params.TRAINING_MODE,
+            features_dir=Path(training.features_dir),
+            source_zip=Path(self.config.data_ingestion.local_data_file),
+            cpu_profile=self.get_cpu_profile_config(),
+            cpu_profile_report_path=Path(training.cpu_profile_report),
+            distributed=self.get_distributed_config(),
+            distributed_dir=Path(training.distributed_dir),
+            checkpoint_dir=Path(training.checkpoint_dir),
+            params_early_stopping_patience=params.EARLY_STOPPING_PATIENCE
         )
 
         return training_config
     
+    @_cached_entity
     def get_evaluation_config(self) -> EvaluationConfig:
-        """
-        Get evaluation configuration
-        Add this method to your ConfigurationManager class
-        """
+        config = self.config.evaluation
+
         eval_config = EvaluationConfig(
-            model_path=Path("artifacts/training/model.h5"),
-            training_data=Path("artifacts/data_ingestion/kidney-ct-scan-image"),
-            mlflow_uri="https://dagshub.com/sakshinayakc05/disease_classification.mlflow",
+            model_path=Path(config.model_path),
+            training_data=Path(config.training_data),
+            mlflow_uri=config.mlflow_uri,
             all_params=self.params,
             params_image_size=self.params.IMAGE_SIZE,
-            params_batch_size=self.params.BATCH_SIZE
+            params_batch_size=self.params.BATCH_SIZE,
+            params_data_loader=self.params.DATA_LOADER,
+            dataset_cache_dir=Path(self.config.dataset_cache.root_dir),
+            source_zip=Path(self.config.data_ingestion.local_data_file),
+            cpu_profile=self.get_cpu_profile_config(),
+            cpu_profile_report_path=Path(self.config.training.cpu_profile_report)
+        )
+        return eval_config
+
+    @_cached_entity
+    def get_model_export_config(self) -> ModelExportConfig:
+        config = self.config.model_export
+
+        self._create_directories([config.root_dir])
+
+        model_export_config = ModelExportConfig(
+            root_dir=Path(config.root_dir),
+            model_path=Path(config.model_path),
+            tflite_model_path=Path(config.tflite_model_path),
+            report_path=Path(config.report_path),
+            serving_model_path=self._project_path(self.config.serving.tflite_model_path),
+            training_data=Path(self.config.evaluation.training_data),
+            dataset_cache_dir=Path(self.config.dataset_cache.root_dir),
+            params_quantization=self.params.QUANTIZATION,
+            params_image_size=self.params.IMAGE_SIZE,
+            params_batch_size=self.params.BATCH_SIZE,
+            params_data_loader=self.params.DATA_LOADER,
+            source_zip=Path(self.config.data_ingestion.local_data_file)
+        )
+
+        return model_export_config
+
+    @_cached_entity
+    def get_serving_config(self) -> ServingConfig:
+        config = self.config.serving
+        model_path = config.tflite_model_path if config.backend == "tflite" else config.model_path
+
+        serving_config = ServingConfig(
+            backend=config.backend,
+            # Not the working directory: the server may be started from anywhere
+            model_path=self._project_path(model_path),
+            max_batch_size=config.max_batch_size,
+            max_wait_ms=config.max_wait_ms,
+            result_cache_size=config.result_cache_size,
+            result_cache_ttl_s=config.result_cache_ttl_s,
+            workers=config.workers,
+            threads=config.threads,
+            intra_op_threads=config.intra_op_threads,
+            inter_op_threads=config.inter_op_threads,
+            preload=config.preload,
+            async_workers=config.async_workers,
+            max_in_flight=config.max_in_flight,
+            request_timeout_s=config.request_timeout_s
         )
-        return eval_config
\ No newline at end of file
+        return serving_config
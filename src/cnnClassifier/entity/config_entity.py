@@ -7,6 +7,17 @@ class DataIngestionConfig:
     source_URL:str
     local_data_file:Path
     unzip_dir:Path
+    source_sha256:str
+    extract_workers:int
+    params_data_loader:str
+
+@dataclass(frozen=True)
+class DatasetCacheConfig:
+    root_dir: Path
+    source_dir: Path
+    num_workers: int
+    params_image_size: list
+    params_data_loader: str
 
 @dataclass(frozen=True)
 class PrepareBaseModelConfig:
@@ -19,6 +30,23 @@ class PrepareBaseModelConfig:
     params_weights: str
     params_classes: int
 
+@dataclass(frozen=True)
+class CpuProfileConfig:
+    name: str
+    intra_op_threads: object  # int, 0 for TensorFlow's default, or "physical"
+    inter_op_threads: object  # int, 0 for TensorFlow's default, or "physical"
+    onednn: bool
+    mixed_bfloat16: bool
+
+
+@dataclass(frozen=True)
+class DistributedConfig:
+    strategy: str
+    local_workers: int
+    port: int
+    timeout_s: float
+
+
 @dataclass(frozen=True)
 class TrainingConfig:
     root_dir: Path
@@ -29,6 +57,20 @@ class TrainingConfig:
     params_batch_size: int
     params_is_augmentation: bool
     params_image_size: list
+    params_data_loader: str
+    params_run_eagerly: bool
+    params_jit_compile: bool
+    throughput_report_path: Path
+    dataset_cache_dir: Path
+    params_training_mode: str
+    features_dir: Path
+    source_zip: Path
+    cpu_profile: CpuProfileConfig
+    cpu_profile_report_path: Path
+    distributed: DistributedConfig
+    distributed_dir: Path
+    checkpoint_dir: Path
+    params_early_stopping_patience: int
 
 @dataclass(frozen=True)
 class EvaluationConfig:
@@ -37,4 +79,41 @@ class EvaluationConfig:
     mlflow_uri: str
     all_params: dict
     params_image_size: list
-    params_batch_size: int
\ No newline at end of file
+    params_batch_size: int
+    params_data_loader: str
+    dataset_cache_dir: Path
+    source_zip: Path
+    cpu_profile: CpuProfileConfig
+    cpu_profile_report_path: Path
+
+@dataclass(frozen=True)
+class ModelExportConfig:
+    root_dir: Path
+    model_path: Path
+    tflite_model_path: Path
+    report_path: Path
+    serving_model_path: Path
+    training_data: Path
+    dataset_cache_dir: Path
+    params_quantization: str
+    params_image_size: list
+    params_batch_size: int
+    params_data_loader: str
+    source_zip: Path
+
+@dataclass(frozen=True)
+class ServingConfig:
+    backend: str
+    model_path: Path
+    max_batch_size: int
+    max_wait_ms: float
+    result_cache_size: int
+    result_cache_ttl_s: float
+    workers: int
+    threads: int
+    intra_op_threads: int
+    inter_op_threads: int
+    preload: bool
+    async_workers: int
+    max_in_flight: int
+    request_timeout_s: float
@@ -0,0 +1,117 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from cnnClassifier import logger
+from cnnClassifier.pipeline.serving_metrics import ERRORS
+
+
+class Overloaded(RuntimeError):
+    """More requests are in flight than the service admits"""
+
+
+class BatchTooLarge(ValueError):
+    """A batch with more images than the service ever admits at once"""
+
+
+class AsyncPredictionService:
+    """Asyncio front end for a classifier and its micro-batcher.
+
+    Base64 and image decoding run on a sized thread pool and inference on the
+    batcher thread, so the event loop only waits. At most `max_in_flight`
+    images are admitted; a slot is held until the image's work actually
+    finishes, even if its request has already timed out, so the backlog behind
+    the executor and batcher stays bounded under overload.
+    """
+
+    def __init__(self, classifier, batcher, max_workers: int = None,
+                 max_in_flight: int = 64, timeout_s: float = 10.0):
+        self.classifier = classifier
+        self.batcher = batcher
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.timeout_s = timeout_s
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or os.cpu_count() or 1, thread_name_prefix="predict-decode"
+        )
+        # Only touched from the event loop thread, so no lock
+        self.in_flight = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _admit(self, count: int):
+        if count > self.max_in_flight:
+            # Would be refused even when idle, so retrying cannot help
+            raise BatchTooLarge(f"{count} images in one batch, limit is {self.max_in_flight}")
+        if self.in_flight + count > self.max_in_flight:
+            self.rejected += count
+            ERRORS.inc(count, stage="overloaded")
+            raise Overloaded(f"{self.in_flight} images in flight, limit is {self.max_in_flight}")
+        self.in_flight += count
+
+    def _release(self, task: asyncio.Task):
+        self.in_flight -= 1
+        if not task.cancelled():
+            # Retrieve it so a timed-out request's late failure is not reported as unhandled
+            task.exception()
+
+    def _prepare(self, image_b64: str):
+        """(cache key, cached result, image to predict); image is None on a cache hit"""
+        image_bytes = self.classifier.decode(image_b64)
+        key, result = self.classifier.cached(image_bytes)
+        if result is not None:
+            return key, result, None
+        return key, None, self.classifier.load_image(image_bytes)
+
+    async def _predict(self, image_b64: str) -> dict:
+        loop = asyncio.get_running_loop()
+        key, result, image = await loop.run_in_executor(self.executor, self._prepare, image_b64)
+        if result is None:
+            result = await asyncio.wrap_future(self.batcher.submit(image))
+            self.classifier.remember(key, result)
+        return result
+
+    def _start(self, image_b64: str) -> asyncio.Task:
+        task = asyncio.ensure_future(self._predict(image_b64))
+        task.add_done_callback(self._release)
+        return task
+
+    async def _result(self, task: asyncio.Task) -> dict:
+        try:
+            # shield: a timed-out request stops waiting, the work keeps its slot until done
+            return await asyncio.wait_for(asyncio.shield(task), self.timeout_s)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            ERRORS.inc(stage="timeout")
+            raise
+
+    async def predict(self, image_b64: str) -> dict:
+        """Predict one base64 image; raises Overloaded when saturated and asyncio.TimeoutError past timeout_s"""
+        self._admit(1)
+        return await self._result(self._start(image_b64))
+
+    async def predict_many(self, images_b64: list) -> list:
+        """Predict several images, admitted all together; failed items come back as {"error": ...}"""
+        if not isinstance(images_b64, list):
+            raise TypeError(f"images must be a list, got {type(images_b64).__name__}")
+        self._admit(len(images_b64))
+        tasks = [self._start(image) for image in images_b64]
+        results = await asyncio.gather(*(self._result(task) for task in tasks), return_exceptions=True)
+        return [
+            {"error": "Prediction timed out" if isinstance(r, asyncio.TimeoutError) else str(r)}
+            if isinstance(r, Exception) else r
+            for r in results
+        ]
+
+    def stats(self) -> dict:
+        cache = self.classifier.cache
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "result_cache": cache.stats() if cache is not None else {"enabled": False},
+        }
+
+    def close(self):
+        self.batcher.close()
+        self.executor.shutdown(wait=False)
+        logger.info("Async prediction service stopped")
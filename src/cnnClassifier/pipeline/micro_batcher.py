@@ -0,0 +1,79 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from cnnClassifier import logger
+
+
+class MicroBatcher:
+    """Gathers concurrent single-item requests into one batched call.
+
+    Callers submit one item and get a Future back; a background worker collects
+    up to `max_batch_size` items, waiting at most `max_wait_ms` after the first
+    one arrives, runs `predict_fn` once on the list and resolves each Future with
+    its own result.
+    """
+
+    def __init__(self, predict_fn, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, item) -> Future:
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def predict(self, item, timeout: float = None):
+        return self.submit(item).result(timeout=timeout)
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                # Serve what we have, then let the loop see the sentinel again
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+            try:
+                results = self.predict_fn(items)
+                if len(results) != len(items):
+                    raise RuntimeError(f"predict_fn returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                logger.exception(f"Batched prediction of {len(items)} items failed: {e}")
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for future, result in zip(futures, results):
+                future.set_result(result)
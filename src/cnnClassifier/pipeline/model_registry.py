@@ -0,0 +1,143 @@
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+import numpy as np
+from cnnClassifier import logger
+
+
+DEFAULT_MODEL_PATH = Path(__file__).parent.parent.parent.parent / "model" / "model.h5"
+
+
+_num_threads = None
+
+
+def set_inference_threads(intra_op: int, inter_op: int):
+    """Cap the threads each serving process uses for inference; call before TensorFlow runs anything"""
+    global _num_threads
+    _num_threads = intra_op
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str(intra_op)
+    os.environ["TF_NUM_INTEROP_THREADS"] = str(inter_op)
+    os.environ["OMP_NUM_THREADS"] = str(intra_op)
+    if "tensorflow" in sys.modules:
+        import tensorflow as tf
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+        except RuntimeError as e:
+            logger.warning(f"TensorFlow is already initialized, thread counts unchanged: {e}")
+    logger.info(f"Inference threads: intra-op {intra_op}, inter-op {inter_op}")
+
+
+def load_serving_model(model_path: Path, model_content: bytes = None):
+    """Load a Keras H5 model, or a TFLite interpreter for .tflite files (no TensorFlow needed with tflite-runtime)"""
+    if Path(model_path).suffix == ".tflite":
+        from cnnClassifier.pipeline.tflite_backend import TFLiteModel
+        return TFLiteModel(model_path, num_threads=_num_threads, model_content=model_content)
+
+    from tensorflow.keras.models import load_model
+    return load_model(str(model_path))
+
+
+class ModelRegistry:
+    """Keeps a single model resident per process and reloads it when the file on disk changes"""
+
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, check_interval: float = 2.0):
+        self.model_path = Path(model_path)
+        self.check_interval = check_interval
+        self._model = None
+        self._mtime = None
+        self._content = None
+        self._content_mtime = None
+        self._version = 0
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _load(self):
+        if not os.path.exists(self.model_path):
+            raise FileNotFoundError(f"Model file not found at: {self.model_path}")
+
+        mtime = os.path.getmtime(self.model_path)
+        logger.info(f"Loading model from: {self.model_path}")
+        content = self._content if self._content_mtime == mtime else None
+        model = load_serving_model(self.model_path, model_content=content)
+        if content is None:
+            # Preloaded bytes are stale once the file changes
+            self._content = self._content_mtime = None
+
+        self._model = model
+        self._mtime = mtime
+        self._version += 1
+        logger.info(f"Model version {self._version} loaded from: {self.model_path}")
+        return model
+
+    def _changed_on_disk(self) -> bool:
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+        try:
+            return os.path.getmtime(self.model_path) != self._mtime
+        except OSError:
+            return False
+
+    def get_model(self):
+        """Return the resident model, loading it on first use and hot-swapping it if the file changed"""
+        model = self._model
+        if model is not None and not self._changed_on_disk():
+            return model
+
+        with self._lock:
+            if self._model is None:
+                return self._load()
+            try:
+                if os.path.getmtime(self.model_path) == self._mtime:
+                    return self._model
+                self._load()
+                self.warm_up()
+            except Exception as e:
+                # A half-written file must not take serving down; keep the previous model
+                logger.exception(f"Hot-swap of {self.model_path} failed, keeping version {self._version}: {e}")
+            return self._model
+
+    def preload(self):
+        """Load ahead of forking serving workers so they share the model copy-on-write.
+
+        A TFLite file is only read into memory here; each worker builds its own
+        interpreter over those bytes on first use, since interpreter thread pools
+        do not survive fork. Keras models are loaded whole.
+        """
+        if self.model_path.suffix == ".tflite":
+            with self._lock:
+                mtime = os.path.getmtime(self.model_path)
+                with open(self.model_path, "rb") as f:
+                    self._content = f.read()
+                self._content_mtime = mtime
+            logger.info(f"Preloaded {len(self._content) / 2**20:.1f} MB of model bytes from: {self.model_path}")
+        else:
+            self.get_model()
+
+    def warm_up(self):
+        """Run one dummy inference so the first real request does not pay for graph tracing"""
+        model = self._model if self._model is not None else self.get_model()
+        input_shape = [1] + [dim or 1 for dim in model.input_shape[1:]]
+        model.predict(np.zeros(input_shape, dtype=np.float32), verbose=0)
+        logger.info(f"Model version {self._version} warmed up with input shape {tuple(input_shape)}")
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_model_registry(model_path=DEFAULT_MODEL_PATH) -> ModelRegistry:
+    """Process-wide registry for the given model file"""
+    key = str(Path(model_path).resolve())
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = ModelRegistry(model_path)
+        return _registries[key]
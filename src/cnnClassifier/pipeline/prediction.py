@@ -1,100 +1,157 @@
 import numpy as np
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing import image
-import os
-from pathlib import Path
+from cnnClassifier import logger
+from cnnClassifier.pipeline.model_registry import get_model_registry
+from cnnClassifier.pipeline.result_cache import ResultCache
+from cnnClassifier.pipeline.serving_metrics import (
+    BASE64_DECODE_SECONDS, IMAGE_PREPROCESS_SECONDS, INFERENCE_SECONDS, INFERENCE_BATCH_SIZE,
+    PREDICTIONS, ERRORS, register_result_cache
+)
+from cnnClassifier.utils.common import decodeImage
+from cnnClassifier.utils.preprocessing import ImagePreprocessor
 
 
 class PredictionPipeline:
-    def __init__(self, filename):
+    def __init__(self, filename=None, registry=None, preprocessor=None, cache: ResultCache = None):
         self.filename = filename
+        self.registry = registry or get_model_registry()
+        self.preprocessor = preprocessor or ImagePreprocessor()
+        self.cache = cache
+        register_result_cache(cache)
 
-    def predict(self):
+    def warm_up(self):
+        self.registry.get_model()
+        self.registry.warm_up()
+
+    @staticmethod
+    def decode(image_b64: str) -> bytes:
+        """Raw image bytes from a base64 request payload"""
         try:
-            # Get project root directory and construct correct model path
-            project_root = Path(__file__).parent.parent.parent.parent
-            model_path = project_root / "model" / "model.h5"
-            
-            # Check if model file exists
-            if not os.path.exists(model_path):
-                raise FileNotFoundError(f"Model file not found at: {model_path}")
-            
-            print(f"Loading model from: {model_path}")
-            
-            # Load model
-            model = load_model(str(model_path))
-            
-            # Check if image file exists
-            if not os.path.exists(self.filename):
-                raise FileNotFoundError(f"Image file not found: {self.filename}")
-            
-            print(f"Processing image: {self.filename}")
-            
-            # Load and preprocess image
-            test_image = image.load_img(self.filename, target_size=(224, 224))
-            test_image = image.img_to_array(test_image)
-            test_image = np.expand_dims(test_image, axis=0)
-            test_image = test_image / 255.0  # Normalize
-            
-            # Make prediction
-            prediction_probs = model.predict(test_image, verbose=0)
-            
-            print(f"Raw prediction: {prediction_probs}")
-            print(f"Prediction shape: {prediction_probs.shape}")
-            
-            # Handle different model outputs
-            if prediction_probs.shape[1] == 1:
-                # Single output (sigmoid) - binary classification
-                prob = prediction_probs[0][0]
-                print(f"Single output value: {prob:.4f}")
-                
-                # Use confidence-based logic
-                confidence_threshold = 0.9  # 90% confidence threshold
-                
-                if prob > confidence_threshold:
-                    prediction = 'Normal'
-                    confidence = prob * 100
-                elif prob < (1 - confidence_threshold):  # Less than 10% (high confidence for other class)
+            with BASE64_DECODE_SECONDS.time():
+                return decodeImage(image_b64)
+        except Exception:
+            ERRORS.inc(stage="base64")
+            raise
+
+    def load_image(self, source) -> np.ndarray:
+        """Decode and resize one image (bytes, ndarray or path) to a (224, 224, 3) uint8 array
+
+        Normalization happens once per batch in predict_batch.
+        """
+        try:
+            with IMAGE_PREPROCESS_SECONDS.time():
+                return self.preprocessor.resize(source)
+        except Exception:
+            ERRORS.inc(stage="preprocess")
+            raise
+
+    def cached(self, source):
+        """Look raw image bytes up in the result cache.
+
+        Returns (key, result): result is None on a miss, key is None when there is
+        no cache or source is not bytes. Pass the key to remember() after predicting.
+        """
+        if self.cache is None or not isinstance(source, (bytes, bytearray)):
+            return None, None
+        # Throttled mtime check, so a swapped model file bumps the version before the lookup
+        self.registry.get_model()
+        key = (ResultCache.digest(source), self.registry.version)
+        result = self.cache.get(*key)
+        if result is not None:
+            PREDICTIONS.inc(label=result["image"])
+        return key, result
+
+    def remember(self, key, result: dict):
+        if key is not None and "error" not in result:
+            self.cache.put(*key, result)
+
+    @staticmethod
+    def interpret(probs) -> dict:
+        """Turn one row of model output into the response returned to clients"""
+        # Handle different model outputs
+        if probs.shape[0] == 1:
+            # Single output (sigmoid) - binary classification
+            prob = probs[0]
+            logger.debug("Single output value: %.4f", prob)
+
+            # Use confidence-based logic
+            confidence_threshold = 0.9  # 90% confidence threshold
+
+            if prob > confidence_threshold:
+                prediction = 'Normal'
+                confidence = prob * 100
+            elif prob < (1 - confidence_threshold):  # Less than 10% (high confidence for other class)
+                prediction = 'Normal'
+                confidence = (1 - prob) * 100
+            else:
+                # Low confidence - predict as Tumor for safety
+                prediction = 'Tumor'
+                confidence = max(prob, 1 - prob) * 100
+
+        else:
+            # Multi-class output (softmax)
+            class_0_prob = probs[0]
+            class_1_prob = probs[1]
+
+            logger.debug("Class probabilities: %.4f, %.4f", class_0_prob, class_1_prob)
+
+            # Get the maximum confidence
+            max_confidence = max(class_0_prob, class_1_prob)
+            confidence = max_confidence * 100
+
+            # Conservative approach: if confidence < 90%, predict Tumor
+            if confidence < 90.0:
+                # Low confidence - predict Tumor for safety
+                prediction = 'Tumor'
+            else:
+                # High confidence - use the actual prediction
+                if class_0_prob > class_1_prob:
                     prediction = 'Normal'
-                    confidence = (1 - prob) * 100
                 else:
-                    # Low confidence - predict as Tumor for safety
-                    prediction = 'Tumor'
-                    confidence = max(prob, 1 - prob) * 100
-                    
-            else:
-                # Multi-class output (softmax)
-                class_0_prob = prediction_probs[0][0]
-                class_1_prob = prediction_probs[0][1]
-                
-                print(f"Class 0 probability: {class_0_prob:.4f}")
-                print(f"Class 1 probability: {class_1_prob:.4f}")
-                
-                # Get the maximum confidence
-                max_confidence = max(class_0_prob, class_1_prob)
-                confidence = max_confidence * 100
-                
-                print(f"Max confidence: {confidence:.2f}%")
-                
-                # Conservative approach: if confidence < 90%, predict Tumor
-                if confidence < 90.0:
                     prediction = 'Tumor'
-                    print("Low confidence - predicting Tumor for safety")
-                else:
-                    # High confidence - use the actual prediction
-                    if class_0_prob > class_1_prob:
-                        prediction = 'Normal'
-                    else:
-                        prediction = 'Tumor'
-                    print(f"High confidence - using model prediction")
-                
-                print(f"Decision logic: Confidence {confidence:.2f}% -> {prediction}")
-            
-            print(f"Final prediction: {prediction}")
-            print(f"Confidence: {confidence:.2f}%")
-            
-            return [{"image": prediction, "confidence": f"{confidence:.2f}%"}]
-                
+
+            logger.debug("Decision logic: confidence %.2f%% -> %s", confidence, prediction)
+
+        return {"image": prediction, "confidence": f"{confidence:.2f}%"}
+
+    def predict_batch(self, images) -> list:
+        """Run one model.predict over a list of images as returned by load_image"""
+        # Resident model, loaded once per process and hot-swapped when model.h5 changes
+        model = self.registry.get_model()
+
+        batch = self.preprocessor.preprocess_batch(images)
+        try:
+            with INFERENCE_SECONDS.time():
+                prediction_probs = model.predict(batch, verbose=0)
+        except Exception:
+            ERRORS.inc(len(images), stage="inference")
+            raise
+        INFERENCE_BATCH_SIZE.observe(len(images))
+        logger.debug("Raw prediction %s: %s", prediction_probs.shape, prediction_probs)
+
+        results = [self.interpret(probs) for probs in prediction_probs]
+        for result in results:
+            PREDICTIONS.inc(label=result["image"])
+        return results
+
+    def predict(self, source=None):
+        """Predict a single image given as bytes, ndarray or path (defaults to self.filename)"""
+        try:
+            source = self.filename if source is None else source
+            if source is None:
+                raise ValueError("No image given to predict")
+
+            key, result = self.cached(source)
+            if result is not None:
+                return [result]
+
+            # Load and preprocess image
+            test_image = self.load_image(source)
+
+            # Make prediction
+            result = self.predict_batch([test_image])
+            self.remember(key, result[0])
+            return result
+
         except Exception as e:
-            print(f"Error in prediction: {str(e)}")
-            return [{"error": str(e)}]
\ No newline at end of file
+            logger.error(f"Error in prediction: {e}")
+            return [{"error": str(e)}]
@@ -0,0 +1,78 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    """LRU cache of prediction results keyed on (sha256 of the image bytes, model version).
+
+    Entries expire after `ttl_s` seconds and the least recently used one is
+    dropped beyond `max_entries`. Seeing a new model version clears the cache,
+    since no earlier entry can be hit again.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_s: float = 3600.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = ttl_s
+        self._entries = OrderedDict()
+        self._model_version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def digest(image_bytes: bytes) -> str:
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    def _is_current(self, model_version: int) -> bool:
+        """Move to a newer model version (dropping all entries); False for an older one"""
+        if self._model_version is not None and model_version < self._model_version:
+            return False
+        if model_version != self._model_version:
+            self._entries.clear()
+            self._model_version = model_version
+        return True
+
+    def get(self, digest: str, model_version: int):
+        with self._lock:
+            entry = self._entries.get((digest, model_version)) if self._is_current(model_version) else None
+            if entry is not None and entry[1] < time.monotonic():
+                del self._entries[(digest, model_version)]
+                self.evictions += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((digest, model_version))
+            self.hits += 1
+            return dict(entry[0])
+
+    def put(self, digest: str, model_version: int, result: dict):
+        with self._lock:
+            # A result computed by a model that has since been swapped out is not kept
+            if not self._is_current(model_version):
+                return
+            self._entries[(digest, model_version)] = (dict(result), time.monotonic() + self.ttl_s)
+            self._entries.move_to_end((digest, model_version))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "model_version": self._model_version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
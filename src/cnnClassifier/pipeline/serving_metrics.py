@@ -0,0 +1,55 @@
+"""Metrics recorded on the prediction path and served at /metrics, per process"""
+from cnnClassifier.utils.metrics import MetricsRegistry
+
+
+REGISTRY = MetricsRegistry()
+
+BASE64_DECODE_SECONDS = REGISTRY.histogram(
+    "cnn_base64_decode_seconds", "Time to base64-decode one request image"
+)
+IMAGE_PREPROCESS_SECONDS = REGISTRY.histogram(
+    "cnn_image_preprocess_seconds", "Time to decode and resize one image"
+)
+INFERENCE_SECONDS = REGISTRY.histogram(
+    "cnn_inference_seconds", "Time of one model.predict call over a batch"
+)
+INFERENCE_BATCH_SIZE = REGISTRY.histogram(
+    "cnn_inference_batch_size", "Images per model.predict call", buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+REQUEST_SECONDS = REGISTRY.histogram(
+    "cnn_request_seconds", "Total time to serve a prediction request", ["route"]
+)
+PREDICTIONS = REGISTRY.counter(
+    "cnn_predictions_total", "Predictions returned, by predicted label", ["label"]
+)
+ERRORS = REGISTRY.counter(
+    "cnn_prediction_errors_total", "Failed predictions, by the stage that failed", ["stage"]
+)
+
+_result_caches = []
+
+
+def register_result_cache(cache):
+    """Export a ResultCache's counters with the other metrics"""
+    if cache is not None and cache not in _result_caches:
+        _result_caches.append(cache)
+
+
+def _result_cache_lines() -> list:
+    if not _result_caches:
+        return []
+    totals = {"hits": 0, "misses": 0, "evictions": 0, "entries": 0}
+    for cache in _result_caches:
+        stats = cache.stats()
+        for key in totals:
+            totals[key] += stats[key]
+    lines = []
+    for key in ("hits", "misses", "evictions"):
+        name = f"cnn_result_cache_{key}_total"
+        lines += [f"# HELP {name} Result cache {key}", f"# TYPE {name} counter", f"{name} {totals[key]}"]
+    name = "cnn_result_cache_entries"
+    lines += [f"# HELP {name} Results currently cached", f"# TYPE {name} gauge", f"{name} {totals['entries']}"]
+    return lines
+
+
+REGISTRY.add_collector(_result_cache_lines)
@@ -0,0 +1,30 @@
+from cnnClassifier.config.configuration import ConfigurationManager
+from cnnClassifier.components.dataset_cache import DatasetCache
+from cnnClassifier import logger
+
+
+STAGE_NAME = "Dataset cache"
+
+
+class DatasetCachePipeline:
+    def __init__(self):
+        pass
+
+    def main(self):
+        config = ConfigurationManager()
+        dataset_cache_config = config.get_dataset_cache_config()
+        dataset_cache = DatasetCache(config=dataset_cache_config)
+        dataset_cache.build()
+
+
+
+if __name__ == '__main__':
+    try:
+        logger.info(f"*******************")
+        logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
+        obj = DatasetCachePipeline()
+        obj.main()
+        logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+    except Exception as e:
+        logger.exception(e)
+        raise e
@@ -1,5 +1,6 @@
 from cnnClassifier.config.configuration import ConfigurationManager
 from cnnClassifier.components.model_training import Training
+from cnnClassifier.utils.distributed import should_launch_locally, launch_local_workers
 from cnnClassifier import logger
 
 STAGE_NAME = "Training"
@@ -13,10 +14,17 @@ class ModelTrainingPipeline:
     def main(self):
         config = ConfigurationManager()
         training_config = config.get_training_config()
+        if should_launch_locally(training_config.distributed):
+            # Each local worker runs this stage again with its own TF_CONFIG
+            launch_local_workers(training_config.distributed, training_config.distributed_dir)
+            return
         training = Training(config=training_config)
         training.get_base_model()
-        training.train_valid_generator()
-        training.train()
+        try:
+            training.train_valid_generator()
+            training.train()
+        finally:
+            training.close_loaders()
 
 
 
@@ -0,0 +1,33 @@
+from cnnClassifier.config.configuration import ConfigurationManager
+from cnnClassifier.components.model_export import ModelExport
+from cnnClassifier import logger
+
+
+STAGE_NAME = "Model export stage"
+
+
+class ModelExportPipeline:
+    def __init__(self):
+        pass
+
+    def main(self):
+        config = ConfigurationManager()
+        model_export_config = config.get_model_export_config()
+        model_export = ModelExport(config=model_export_config)
+        model_export.convert()
+        accuracies = model_export.evaluate()
+        model_export.save_report(accuracies)
+        model_export.publish()
+
+
+
+if __name__ == '__main__':
+    try:
+        logger.info(f"*******************")
+        logger.info(f">>>>>> stage {STAGE_NAME} started <<<<<<")
+        obj = ModelExportPipeline()
+        obj.main()
+        logger.info(f">>>>>> stage {STAGE_NAME} completed <<<<<<\n\nx==========x")
+    except Exception as e:
+        logger.exception(e)
+        raise e
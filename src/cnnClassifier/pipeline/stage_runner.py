@@ -0,0 +1,108 @@
+import os
+import json
+import hashlib
+import importlib
+import dataclasses
+from pathlib import Path
+from dataclasses import dataclass, field
+from cnnClassifier import logger
+
+
+DEFAULT_MANIFEST_PATH = Path("artifacts/stage_manifest.json")
+
+
+@dataclass
+class Stage:
+    """One pipeline stage and everything its output depends on
+
+    pipeline: the stage pipeline class, or "module:Class" to import it only
+        when the stage actually runs (keeps TensorFlow out of skipped runs)
+    config: the stage's config entity from ConfigurationManager
+    params: names of the params.yaml keys it reads
+    deps: input files or directories (code, artifacts of earlier stages)
+    outs: files or directories it produces
+    """
+    name: str
+    pipeline: object
+    config: object
+    params: list = field(default_factory=list)
+    deps: list = field(default_factory=list)
+    outs: list = field(default_factory=list)
+
+
+def _path_fingerprint(path, digest):
+    """Stat-based fingerprint: relative path, size and mtime of every file under path"""
+    path = Path(path)
+    if path.is_file():
+        stat = path.stat()
+        digest.update(f"{path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    elif path.is_dir():
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                stat = os.stat(file_path)
+                digest.update(f"{file_path}:{stat.st_size}:{stat.st_mtime_ns}\n".encode())
+    else:
+        digest.update(f"{path}:missing\n".encode())
+
+
+def _resolve_pipeline(pipeline):
+    if isinstance(pipeline, str):
+        module_name, class_name = pipeline.split(":")
+        return getattr(importlib.import_module(module_name), class_name)
+    return pipeline
+
+
+class StageRunner:
+    """Runs stages in order, skipping those whose fingerprint matches the stored manifest"""
+
+    def __init__(self, all_params, manifest_path=DEFAULT_MANIFEST_PATH, force: bool = False):
+        self.all_params = all_params
+        self.manifest_path = Path(manifest_path)
+        self.force = force
+        self.manifest = {}
+        if self.manifest_path.exists():
+            with open(self.manifest_path) as f:
+                self.manifest = json.load(f)
+
+    def fingerprint(self, stage: Stage) -> str:
+        digest = hashlib.sha256()
+        config = dataclasses.asdict(stage.config) if dataclasses.is_dataclass(stage.config) else stage.config
+        digest.update(json.dumps(config, sort_keys=True, default=str).encode())
+        params = {name: self.all_params.get(name) for name in stage.params}
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        for dep in stage.deps:
+            _path_fingerprint(dep, digest)
+        return digest.hexdigest()
+
+    def _save_manifest(self):
+        os.makedirs(self.manifest_path.parent, exist_ok=True)
+        with open(self.manifest_path, "w") as f:
+            json.dump(self.manifest, f, indent=4)
+
+    def run(self, stage: Stage):
+        fingerprint = self.fingerprint(stage)
+        outs_present = all(Path(out).exists() for out in stage.outs)
+        if not self.force and outs_present and self.manifest.get(stage.name) == fingerprint:
+            logger.info(f">>>>>> stage {stage.name} skipped <<<<<< (inputs unchanged)")
+            return False
+
+        logger.info(f"*******************")
+        logger.info(f">>>>>> stage {stage.name} started <<<<<<")
+        # Drop the entry first so an interrupted run is never mistaken for a finished one
+        self.manifest.pop(stage.name, None)
+        self._save_manifest()
+        _resolve_pipeline(stage.pipeline)().main()
+        self.manifest[stage.name] = fingerprint
+        self._save_manifest()
+        logger.info(f">>>>>> stage {stage.name} completed <<<<<<\n\nx==========x")
+        return True
+
+    def run_all(self, stages):
+        for stage in stages:
+            try:
+                self.run(stage)
+            except Exception as e:
+                logger.exception(e)
+                raise e
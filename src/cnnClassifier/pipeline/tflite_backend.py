@@ -0,0 +1,66 @@
+import threading
+import numpy as np
+
+
+def _interpreter_class():
+    """Prefer the standalone tflite-runtime wheel so serving does not need full TensorFlow"""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteModel:
+    """TFLite interpreter behind the subset of the Keras model API used for serving"""
+
+    def __init__(self, model_path, num_threads: int = None, model_content: bytes = None):
+        self.model_path = str(model_path)
+        if model_content is not None:
+            # The interpreter reads weights in place from the buffer, so interpreters
+            # built in forked workers over bytes read by the parent share those pages
+            self._interpreter = _interpreter_class()(model_content=model_content, num_threads=num_threads)
+        else:
+            self._interpreter = _interpreter_class()(model_path=self.model_path, num_threads=num_threads)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size = int(self._input["shape"][0])
+        self._lock = threading.Lock()
+
+    @property
+    def input_shape(self) -> tuple:
+        return (None,) + tuple(int(dim) for dim in self._input["shape"][1:])
+
+    def _resize(self, batch_size: int):
+        if batch_size != self._batch_size:
+            shape = [batch_size] + list(self._input["shape"][1:])
+            self._interpreter.resize_tensor_input(self._input["index"], shape)
+            self._interpreter.allocate_tensors()
+            self._input = self._interpreter.get_input_details()[0]
+            self._output = self._interpreter.get_output_details()[0]
+            self._batch_size = batch_size
+
+    def _quantize(self, batch: np.ndarray) -> np.ndarray:
+        dtype = self._input["dtype"]
+        if dtype == np.float32:
+            return batch.astype(np.float32, copy=False)
+        scale, zero_point = self._input["quantization"]
+        info = np.iinfo(dtype)
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(dtype)
+
+    def _dequantize(self, output: np.ndarray) -> np.ndarray:
+        if output.dtype == np.float32:
+            return output
+        scale, zero_point = self._output["quantization"]
+        return (output.astype(np.float32) - zero_point) * scale
+
+    def predict(self, batch: np.ndarray, verbose: int = 0) -> np.ndarray:
+        # One interpreter holds one set of tensors, so invocations are serialized
+        with self._lock:
+            self._resize(len(batch))
+            self._interpreter.set_tensor(self._input["index"], self._quantize(batch))
+            self._interpreter.invoke()
+            output = self._interpreter.get_tensor(self._output["index"])
+            return self._dequantize(output).copy()
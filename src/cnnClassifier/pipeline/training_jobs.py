@@ -0,0 +1,272 @@
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import queue
+import threading
+import subprocess
+from pathlib import Path
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field, asdict
+from cnnClassifier import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process guard
+    fcntl = None
+
+
+STAGE_PATTERN = re.compile(r">>>>>> stage (?P<stage>.+?) (?P<event>started|completed|skipped) <<<<<<")
+
+
+def _pid_alive(pid) -> bool:
+    if not isinstance(pid, int) or pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@dataclass
+class TrainingJob:
+    job_id: str
+    status: str = "queued"  # queued | running | succeeded | failed
+    created_at: float = field(default_factory=time.time)
+    started_at: float = None
+    finished_at: float = None
+    current_stage: str = None
+    stages: dict = field(default_factory=OrderedDict)
+    returncode: int = None
+    log_tail: deque = field(default_factory=lambda: deque(maxlen=20))
+
+    def to_dict(self) -> dict:
+        job = asdict(self)
+        job["stages"] = dict(self.stages)
+        job["log_tail"] = list(self.log_tail)
+        return job
+
+    @classmethod
+    def from_dict(cls, job: dict) -> "TrainingJob":
+        job = dict(job)
+        job["stages"] = OrderedDict(job.get("stages") or {})
+        job["log_tail"] = deque(job.get("log_tail") or [], maxlen=20)
+        return cls(**job)
+
+
+class TrainingJobManager:
+    """Runs the training pipeline in a subprocess, one job at a time, off the request threads.
+
+    Submitting while a job is queued or running returns that job instead of
+    starting another one. With state_dir set, job state is written there and a
+    lock file guards the pipeline, so several server processes (pre-fork
+    workers) share one job at a time and can all report on it. The pipeline
+    child holds the lock too, so a job outlives a server process that dies.
+    """
+
+    def __init__(self, command=None, cwd=None, max_history: int = 20, state_dir=None):
+        self.command = command or [sys.executable, "main.py"]
+        self.cwd = cwd
+        self.max_history = max_history
+        self.state_dir = Path(state_dir) if state_dir else None
+        if self.state_dir is not None:
+            os.makedirs(self.state_dir, exist_ok=True)
+        self._jobs = OrderedDict()
+        self._active = None
+        self._run_lock = None
+        self._last_saved = 0.0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        # Started on first submit, so a pre-fork parent holds no threads
+        self._worker = None
+
+    def _state_path(self, job_id: str) -> Path:
+        return self.state_dir / f"{job_id}.json"
+
+    def _save(self, job: TrainingJob):
+        """Write job state for other processes; call with the lock held"""
+        if self.state_dir is None:
+            return
+        path = self._state_path(job.job_id)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(job.to_dict(), f)
+        os.replace(tmp_path, path)
+        self._last_saved = time.monotonic()
+
+    def _load(self, job_id: str):
+        if self.state_dir is None or not re.fullmatch(r"[0-9a-f]+", job_id):
+            return None
+        try:
+            with open(self._state_path(job_id)) as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if job["status"] in ("queued", "running") and self._read_active().get("job_id") != job_id:
+            # The marker is written before the job and removed after it finishes, so an
+            # unfinished job without it was left behind by a server process that died
+            job["status"] = "failed"
+        return job
+
+    def _read_active(self) -> dict:
+        """state_dir/active: the running job's id, the pid of the server process running it
+        and, once started, the pid of the pipeline child.
+
+        A marker whose server process and child both no longer exist is treated as absent.
+        """
+        try:
+            active = json.loads((self.state_dir / "active").read_text())
+        except (OSError, ValueError):
+            return {}
+        return active if _pid_alive(active.get("pid")) or _pid_alive(active.get("child_pid")) else {}
+
+    def _write_active(self, job: TrainingJob, child_pid: int = None):
+        path = self.state_dir / "active"
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps({"job_id": job.job_id, "pid": os.getpid(), "child_pid": child_pid}))
+        os.replace(tmp_path, path)
+
+    def _clear_active(self):
+        (self.state_dir / "active").unlink(missing_ok=True)
+
+    def _fail_abandoned(self):
+        """Mark the job of a dead server process as failed; call with the run lock held"""
+        try:
+            stale = json.loads((self.state_dir / "active").read_text())
+        except (OSError, ValueError):
+            return
+        # Holding the run lock means the marker's owner and its child are gone, even if a pid was reused
+        job = self._load(stale.get("job_id", ""))
+        if job is not None and job["finished_at"] is None:
+            job = TrainingJob.from_dict(job)
+            job.status = "failed"
+            job.finished_at = time.time()
+            job.log_tail.append(f"Server process {stale.get('pid')} exited before this job finished")
+            self._save(job)
+            logger.warning(f"Training job {job.job_id} was abandoned by process {stale.get('pid')}, marked failed")
+        self._clear_active()
+
+    def _acquire_run_lock(self) -> bool:
+        """Take the cross-process pipeline lock; False if another process holds it"""
+        if self.state_dir is None or fcntl is None:
+            return True
+        handle = open(self.state_dir / "run.lock", "a+")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._run_lock = handle
+        return True
+
+    def _release_run_lock(self):
+        if self._run_lock is not None:
+            fcntl.flock(self._run_lock, fcntl.LOCK_UN)
+            self._run_lock.close()
+            self._run_lock = None
+
+    def _foreign_active_job(self):
+        """The job another process is running, as recorded in state_dir/active"""
+        job_id = self._read_active().get("job_id", "")
+        job = self._load(job_id) if job_id else None
+        # The lock is held but the state is not written yet; report it as queued
+        return TrainingJob.from_dict(job) if job else TrainingJob(job_id=job_id or "unknown")
+
+    def submit(self):
+        """Return (job, created) where created is False if an active job was reused"""
+        with self._lock:
+            if self._active is not None and self._active.status in ("queued", "running"):
+                return self._active, False
+            if not self._acquire_run_lock():
+                return self._foreign_active_job(), False
+            job = TrainingJob(job_id=uuid.uuid4().hex[:12])
+            self._jobs[job.job_id] = job
+            while len(self._jobs) > self.max_history:
+                self._jobs.popitem(last=False)
+            self._active = job
+            if self.state_dir is not None:
+                self._fail_abandoned()
+                self._write_active(job)
+            self._save(job)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="training-jobs", daemon=True)
+                self._worker.start()
+        self._queue.put(job)
+        logger.info(f"Training job {job.job_id} queued")
+        return job, True
+
+    def get(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return job.to_dict()
+        return self._load(job_id)
+
+    def _track(self, job: TrainingJob, line: str):
+        match = STAGE_PATTERN.search(line)
+        with self._lock:
+            job.log_tail.append(line)
+            if match is None:
+                # Log lines alone are flushed to state_dir at most once a second
+                if time.monotonic() - self._last_saved >= 1.0:
+                    self._save(job)
+                return
+            stage = match.group("stage")
+            event = match.group("event")
+            if event == "started":
+                job.current_stage = stage
+                job.stages[stage] = "running"
+            else:
+                job.stages[stage] = event
+            self._save(job)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            with self._lock:
+                job.status = "running"
+                job.started_at = time.time()
+                self._save(job)
+            logger.info(f"Training job {job.job_id} started: {' '.join(self.command)}")
+
+            try:
+                process = subprocess.Popen(
+                    self.command,
+                    cwd=self.cwd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    # Lower priority so serving threads keep the CPU under contention
+                    preexec_fn=(lambda: os.nice(10)) if hasattr(os, "nice") else None,
+                    # The child keeps the run lock, and outlives signals to the server's process group,
+                    # so a pipeline orphaned by a dead server still blocks a second one
+                    start_new_session=True,
+                    pass_fds=(self._run_lock.fileno(),) if self._run_lock is not None else ()
+                )
+                if self.state_dir is not None:
+                    with self._lock:
+                        self._write_active(job, child_pid=process.pid)
+                for line in process.stdout:
+                    self._track(job, line.rstrip())
+                returncode = process.wait()
+            except Exception as e:
+                logger.exception(f"Training job {job.job_id} could not run: {e}")
+                self._track(job, str(e))
+                returncode = -1
+
+            with self._lock:
+                job.returncode = returncode
+                job.finished_at = time.time()
+                job.status = "succeeded" if returncode == 0 else "failed"
+                if job.current_stage and job.stages.get(job.current_stage) == "running" and returncode != 0:
+                    job.stages[job.current_stage] = "failed"
+                self._save(job)
+                if self.state_dir is not None:
+                    self._clear_active()
+                self._release_run_lock()
+            logger.info(f"Training job {job.job_id} {job.status} (exit code {returncode})")
@@ -3,16 +3,29 @@ from box.exceptions import BoxValueError
 import yaml
 from src.cnnClassifier import logger
 import json
-import joblib
-from ensure import ensure_annotations
 from box import ConfigBox
 from pathlib import Path
 from typing import Any
 import base64
+import hashlib
 
 
+# Runtime type checking of these helpers' arguments costs every call, so it is
+# opt-in for debugging: CNN_CLASSIFIER_VALIDATE=1
+VALIDATE_ANNOTATIONS = os.environ.get("CNN_CLASSIFIER_VALIDATE", "").lower() in ("1", "true", "yes")
 
-@ensure_annotations
+
+def validate_annotations(func):
+    """ensure_annotations when VALIDATE_ANNOTATIONS is on, otherwise the function itself"""
+    if not VALIDATE_ANNOTATIONS:
+        return func
+    from ensure import ensure_annotations
+    checked = ensure_annotations(func)
+    checked.__wrapped__ = func
+    return checked
+
+
+@validate_annotations
 def read_yaml(path_to_yaml: Path) -> ConfigBox:
     """reads yaml file and returns
 
@@ -38,7 +51,7 @@ def read_yaml(path_to_yaml: Path) -> ConfigBox:
     
 
 
-@ensure_annotations
+@validate_annotations
 def create_directories(path_to_directories: list, verbose=True):
     """create list of directories
 
@@ -52,7 +65,7 @@ def create_directories(path_to_directories: list, verbose=True):
             logger.info(f"created directory at: {path}")
 
 
-@ensure_annotations
+@validate_annotations
 def save_json(path: Path, data: dict):
     """save json data
 
@@ -68,7 +81,7 @@ def save_json(path: Path, data: dict):
 
 
 
-@ensure_annotations
+@validate_annotations
 def load_json(path: Path) -> ConfigBox:
     """load json files data
 
@@ -85,7 +98,7 @@ def load_json(path: Path) -> ConfigBox:
     return ConfigBox(content)
 
 
-@ensure_annotations
+@validate_annotations
 def save_bin(data: Any, path: Path):
     """save binary file
 
@@ -93,11 +106,12 @@ def save_bin(data: Any, path: Path):
         data (Any): data to be saved as binary
         path (Path): path to binary file
     """
+    import joblib  # heavy, and only these two helpers need it
     joblib.dump(value=data, filename=path)
     logger.info(f"binary file saved at: {path}")
 
 
-@ensure_annotations
+@validate_annotations
 def load_bin(path: Path) -> Any:
     """load binary data
 
@@ -107,11 +121,12 @@ def load_bin(path: Path) -> Any:
     Returns:
         Any: object stored in the file
     """
+    import joblib
     data = joblib.load(path)
     logger.info(f"binary file loaded from: {path}")
     return data
 
-@ensure_annotations
+@validate_annotations
 def get_size(path: Path) -> str:
     """get size in KB
 
@@ -125,11 +140,68 @@ def get_size(path: Path) -> str:
     return f"~ {size_in_kb} KB"
 
 
-def decodeImage(imgstring, fileName):
+def file_digest(path, algorithm: str = "sha256", chunk_size: int = 1 << 20) -> str:
+    """hex digest of a file, read in chunks so memory stays flat for large files
+
+    Args:
+        path: file to hash
+        algorithm (str): any name hashlib.new accepts
+
+    Returns:
+        str: hex digest
+    """
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".ppm", ".tif", ".tiff")
+
+
+def list_class_files(directory) -> tuple:
+    """list images per class the way flow_from_directory does
+
+    Args:
+        directory: folder with one sub-directory per class
+
+    Returns:
+        tuple: (sorted class names, list of sorted file paths per class)
+    """
+    class_names = sorted(
+        d for d in os.listdir(directory) if os.path.isdir(os.path.join(directory, d))
+    )
+    class_files = []
+    for class_name in class_names:
+        files = []
+        for root, _, filenames in sorted(os.walk(os.path.join(directory, class_name))):
+            for filename in sorted(filenames):
+                if filename.lower().endswith(IMAGE_EXTENSIONS):
+                    files.append(os.path.join(root, filename))
+        class_files.append(files)
+    return class_names, class_files
+
+
+def split_range(num_files: int, validation_split: float, subset: str) -> range:
+    """indices of one class's files in the 'training' or 'validation' subset
+
+    Matches ImageDataGenerator(validation_split=...): the first fraction of
+    each class is validation, the rest is training.
+    """
+    if subset not in ("training", "validation"):
+        raise ValueError(f"subset must be 'training' or 'validation', got: {subset}")
+    split_at = int(validation_split * num_files)
+    return range(0, split_at) if subset == "validation" else range(split_at, num_files)
+
+
+def decodeImage(imgstring, fileName=None) -> bytes:
+    """Decode a base64 image; the bytes are only written to disk when fileName is given"""
     imgdata = base64.b64decode(imgstring)
-    with open(fileName, 'wb') as f:
-        f.write(imgdata)
-        f.close()
+    if fileName is not None:
+        with open(fileName, 'wb') as f:
+            f.write(imgdata)
+    return imgdata
 
 
 def encodeImageIntoBase64(croppedImagePath):
@@ -0,0 +1,134 @@
+import os
+import sys
+from pathlib import Path
+from cnnClassifier import logger
+from cnnClassifier.entity.config_entity import CpuProfileConfig
+from cnnClassifier.utils.common import save_json, load_json
+from cnnClassifier.utils.distributed import workers_on_this_host
+
+
+BF16_CPU_FLAGS = ("avx512_bf16", "amx_bf16")
+
+
+def _cpuinfo() -> str:
+    try:
+        with open("/proc/cpuinfo") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def supports_bfloat16() -> bool:
+    """True if the CPU has native bfloat16 arithmetic (Linux only; elsewhere bf16 would be emulated)"""
+    for line in _cpuinfo().splitlines():
+        if line.startswith("flags"):
+            flags = set(line.split(":", 1)[1].split())
+            return any(flag in flags for flag in BF16_CPU_FLAGS)
+    return False
+
+
+def physical_cores() -> int:
+    cores, physical_id = set(), None
+    for line in _cpuinfo().splitlines():
+        key, _, value = line.partition(":")
+        key = key.strip()
+        if key == "physical id":
+            physical_id = value.strip()
+        elif key == "core id":
+            cores.add((physical_id, value.strip()))
+    count = len(cores) or os.cpu_count() or 1
+    # A container or taskset may let this process use fewer CPUs than the machine has
+    if hasattr(os, "sched_getaffinity"):
+        count = min(count, len(os.sched_getaffinity(0)))
+    return count
+
+
+def _threads(value) -> int:
+    """Threads for this process; workers of a cluster on the same machine split the count between them"""
+    threads = physical_cores() if value == "physical" else int(value or 0)
+    return max(1, threads // workers_on_this_host()) if threads else 0
+
+
+def configure_cpu_environment(profile: CpuProfileConfig):
+    """Set the parts of a profile TensorFlow reads from the environment; effective only before it is imported"""
+    onednn = "1" if profile.onednn else "0"
+    if "tensorflow" in sys.modules and os.environ.get("TF_ENABLE_ONEDNN_OPTS") != onednn:
+        logger.warning(f"TensorFlow is already loaded, oneDNN setting {onednn} applies from the next process")
+    os.environ["TF_ENABLE_ONEDNN_OPTS"] = onednn
+    for variable, value in (("TF_NUM_INTRAOP_THREADS", profile.intra_op_threads),
+                            ("TF_NUM_INTEROP_THREADS", profile.inter_op_threads)):
+        threads = _threads(value)
+        if threads:
+            os.environ[variable] = str(threads)
+
+
+def apply_cpu_profile(profile: CpuProfileConfig) -> dict:
+    """Apply threading, oneDNN and the Keras dtype policy; call before building or loading models
+
+    Returns:
+        dict: the settings actually in effect, for reports
+    """
+    configure_cpu_environment(profile)
+    import tensorflow as tf
+
+    intra, inter = _threads(profile.intra_op_threads), _threads(profile.inter_op_threads)
+    try:
+        if intra:
+            tf.config.threading.set_intra_op_parallelism_threads(intra)
+        if inter:
+            tf.config.threading.set_inter_op_parallelism_threads(inter)
+    except RuntimeError as e:
+        # The runtime is already up (an earlier stage in this process); TF_NUM_*_THREADS covered it if set in time
+        logger.warning(f"Could not change TensorFlow thread pools: {e}")
+
+    mixed_bfloat16 = profile.mixed_bfloat16 and supports_bfloat16()
+    if profile.mixed_bfloat16 and not mixed_bfloat16:
+        logger.warning(f"CPU profile {profile.name}: no native bfloat16 on this CPU, staying in float32")
+    tf.keras.mixed_precision.set_global_policy("mixed_bfloat16" if mixed_bfloat16 else "float32")
+
+    settings = {
+        "intra_op_threads": tf.config.threading.get_intra_op_parallelism_threads(),
+        "inter_op_threads": tf.config.threading.get_inter_op_parallelism_threads(),
+        "onednn": os.environ["TF_ENABLE_ONEDNN_OPTS"] == "1",
+        "mixed_bfloat16": mixed_bfloat16,
+    }
+    logger.info(f"CPU profile {profile.name}: {settings}")
+    return settings
+
+
+def with_dtype_policy(model, policy: str):
+    """Copy of a model whose layers compute in `policy`, with the same weights.
+
+    Saved models pin every layer's dtype, so a global policy alone does not
+    change a loaded model. Output layers stay float32 so softmax and the loss
+    keep full precision.
+    """
+    import tensorflow as tf
+
+    output_names = set(model.output_names)
+
+    def clone_layer(layer):
+        config = layer.get_config()
+        config["dtype"] = "float32" if layer.name in output_names else policy
+        return layer.__class__.from_config(config)
+
+    clone = tf.keras.models.clone_model(model, clone_function=clone_layer)
+    clone.set_weights(model.get_weights())
+    return clone
+
+
+def save_profile_report(path, profile: CpuProfileConfig, settings: dict, **metrics):
+    """Merge one profile's settings and metrics into the per-profile report"""
+    path = Path(path)
+    report = load_json(path).to_dict() if path.exists() else {}
+    entry = report.get(profile.name, {})
+    entry.update(settings)
+    entry.update(metrics)
+    report[profile.name] = entry
+
+    baseline = report.get("default", {}).get("eval_accuracy")
+    for result in report.values():
+        if baseline is not None and "eval_accuracy" in result:
+            result["accuracy_delta_vs_default"] = round(result["eval_accuracy"] - baseline, 4)
+
+    save_json(path=path, data=report)
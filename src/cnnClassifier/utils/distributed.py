@@ -0,0 +1,171 @@
+"""Multi-worker training: reading TF_CONFIG, picking the chief, and running a cluster on localhost"""
+import os
+import sys
+import json
+import time
+import socket
+import subprocess
+from pathlib import Path
+from cnnClassifier import logger
+from cnnClassifier.entity.config_entity import DistributedConfig
+
+
+TRAINING_MODULE = "cnnClassifier.pipeline.stage_03_model_training"
+
+
+def tf_config() -> dict:
+    value = os.environ.get("TF_CONFIG")
+    return json.loads(value) if value else {}
+
+
+def is_multi_worker(config: DistributedConfig) -> bool:
+    return config.strategy == "multi_worker" or bool(tf_config().get("cluster"))
+
+
+def should_launch_locally(config: DistributedConfig) -> bool:
+    """True in the process that has to start the local workers rather than be one"""
+    return config.strategy == "multi_worker" and config.local_workers > 1 and not tf_config()
+
+
+def worker_index() -> tuple:
+    """(index of this worker, number of workers); a chief, if listed, is worker 0"""
+    config = tf_config()
+    cluster, task = config.get("cluster", {}), config.get("task", {})
+    num_chiefs = len(cluster.get("chief", []))
+    num_workers = num_chiefs + len(cluster.get("worker", []))
+    if task.get("type") == "chief":
+        index = 0
+    else:
+        index = num_chiefs + int(task.get("index", 0))
+    return index, max(1, num_workers)
+
+
+def workers_on_this_host() -> int:
+    """Number of cluster tasks sharing this task's host; 1 outside a cluster"""
+    config = tf_config()
+    cluster, task = config.get("cluster", {}), config.get("task", {})
+    addresses = cluster.get(task.get("type"), [])
+    index = int(task.get("index", 0))
+    if index >= len(addresses):
+        return 1
+    host = addresses[index].rsplit(":", 1)[0]
+    return max(1, sum(address.rsplit(":", 1)[0] == host
+                      for role in ("chief", "worker") for address in cluster.get(role, [])))
+
+
+def is_chief() -> bool:
+    return worker_index()[0] == 0
+
+
+def create_strategy(config: DistributedConfig):
+    """MultiWorkerMirroredStrategy in multi-worker mode, TensorFlow's default strategy otherwise
+
+    Has to run before any other TensorFlow op in the process.
+    """
+    import tensorflow as tf
+
+    if not is_multi_worker(config):
+        return tf.distribute.get_strategy()
+    strategy = tf.distribute.MultiWorkerMirroredStrategy()
+    index, num_workers = worker_index()
+    logger.info(f"MultiWorkerMirroredStrategy: worker {index} of {num_workers}, "
+                f"{strategy.num_replicas_in_sync} replicas in sync")
+    return strategy
+
+
+def broadcast_from_chief(strategy, value: float = 0.0) -> float:
+    """The chief's `value`, on every worker of a multi-worker strategy; `value` itself otherwise
+
+    It is a collective, so it is also a barrier: no worker returns before all
+    of them have called it.
+    """
+    import tensorflow as tf
+
+    if not isinstance(strategy, tf.distribute.MultiWorkerMirroredStrategy):
+        return value
+
+    def contribution():
+        # Replica 0 of the cluster runs on the chief
+        first = tf.distribute.get_replica_context().replica_id_in_sync_group == 0
+        return tf.constant(float(value)) if first else tf.constant(0.0)
+
+    return float(strategy.reduce(tf.distribute.ReduceOp.SUM, strategy.run(contribution), axis=None))
+
+
+def worker_save_path(path, scratch_dir) -> Path:
+    """Where this worker writes `path`.
+
+    Every worker has to take part in saving a distributed model, but only the
+    chief writes the real file; the others write to a scratch copy that is
+    removed afterwards.
+    """
+    path = Path(path)
+    if is_chief():
+        return path
+    return Path(scratch_dir) / f"worker_{worker_index()[0]}" / path.name
+
+
+def _free_ports(count: int) -> list:
+    sockets = []
+    try:
+        for _ in range(count):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.bind(("localhost", 0))
+            sockets.append(sock)
+        return [sock.getsockname()[1] for sock in sockets]
+    finally:
+        for sock in sockets:
+            sock.close()
+
+
+def local_cluster(num_workers: int, port: int = 0) -> list:
+    """TF_CONFIG of each worker of a cluster on localhost"""
+    ports = list(range(port, port + num_workers)) if port else _free_ports(num_workers)
+    cluster = {"worker": [f"localhost:{p}" for p in ports]}
+    return [{"cluster": cluster, "task": {"type": "worker", "index": i}} for i in range(num_workers)]
+
+
+def launch_local_workers(config: DistributedConfig, log_dir, module: str = TRAINING_MODULE):
+    """Run `module` as config.local_workers processes on localhost and wait for all of them
+
+    Worker output goes to log_dir/worker_<i>.log. If one worker fails the
+    others would block in collectives forever, so they are terminated; so are
+    all of them once config.timeout_s has passed.
+    """
+    log_dir = Path(log_dir)
+    log_dir.mkdir(parents=True, exist_ok=True)
+    src_dir = str(Path(__file__).resolve().parents[2])
+    # Workers share the machine; a CPU profile's own thread counts are split the same way in each worker
+    threads = str(max(1, (os.cpu_count() or 1) // config.local_workers))
+
+    workers = []
+    for i, worker_config in enumerate(local_cluster(config.local_workers, config.port)):
+        env = dict(os.environ)
+        env["TF_CONFIG"] = json.dumps(worker_config)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [src_dir, env.get("PYTHONPATH")]))
+        env["TF_NUM_INTRAOP_THREADS"] = threads
+        log_file = open(log_dir / f"worker_{i}.log", "w")
+        process = subprocess.Popen([sys.executable, "-m", module], env=env,
+                                   stdout=log_file, stderr=subprocess.STDOUT)
+        workers.append((process, log_file))
+    logger.info(f"Started {len(workers)} local workers, logs in {log_dir}")
+
+    deadline = time.monotonic() + config.timeout_s
+    try:
+        while True:
+            codes = [process.poll() for process, _ in workers]
+            failed = next((i for i, code in enumerate(codes) if code not in (None, 0)), None)
+            if failed is not None:
+                raise RuntimeError(f"Worker {failed} exited with {codes[failed]}, see {log_dir / f'worker_{failed}.log'}")
+            if all(code == 0 for code in codes):
+                break
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Local workers still running after {config.timeout_s}s, logs in {log_dir}")
+            time.sleep(1)
+    finally:
+        for process, log_file in workers:
+            if process.poll() is None:
+                process.terminate()
+                process.wait()
+            log_file.close()
+    logger.info(f"All {len(workers)} local workers finished")
@@ -0,0 +1,186 @@
+import os
+import re
+import shutil
+import time
+import zlib
+import zipfile
+import threading
+import http.client
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from cnnClassifier import logger
+from cnnClassifier.utils.common import file_digest
+
+
+CHUNK_SIZE = 1 << 20
+
+
+class HTMLResponseError(RuntimeError):
+    """The server answered with a web page instead of the file (e.g. a Google Drive confirmation page)"""
+
+
+class IncompleteDownload(ConnectionError):
+    """The response ended before the size the server announced; retried and resumed like a dropped connection"""
+
+
+def _content_range(headers):
+    """(start, total) from a Content-Range header, either None where the server left it out"""
+    match = re.match(r"bytes (?:(\d+)-\d+|\*)/(\d+|\*)", headers.get("Content-Range") or "")
+    if not match:
+        return None, None
+    start, total = match.groups()
+    return (int(start) if start else None), (int(total) if total != "*" else None)
+
+
+def _fetch(url: str, part_path: str, timeout: float, chunk_size: int):
+    """Append the remainder of url to part_path, resuming from its current size with an HTTP range request
+
+    Raises IncompleteDownload when part_path does not end up at the size the
+    server announced; read() only returns b"" on an early EOF, it does not raise.
+    """
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    request = urllib.request.Request(url)
+    if offset:
+        request.add_header("Range", f"bytes={offset}-")
+
+    try:
+        response = urllib.request.urlopen(request, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        if e.code == 416 and offset:
+            # Range starts at or past the end: complete only if the file is exactly the announced size
+            _, total = _content_range(e.headers)
+            if total == offset:
+                return
+            os.remove(part_path)
+            raise IncompleteDownload(f"Partial download of {url} is {offset} bytes, server has {total}; restarting")
+        raise
+
+    with response:
+        if "text/html" in response.headers.get("Content-Type", ""):
+            raise HTMLResponseError(f"{url} returned an HTML page instead of the file")
+        start, total = _content_range(response.headers)
+        # 200 (or a range that does not start where we asked) means start over
+        resumed = offset and response.status == 206 and start == offset
+        if offset and not resumed:
+            logger.info(f"Server does not support resume for {url}, restarting download")
+        if not resumed:
+            length = response.headers.get("Content-Length")
+            total = int(length) if length and length.isdigit() else None
+        with open(part_path, "ab" if resumed else "wb") as f:
+            for chunk in iter(lambda: response.read(chunk_size), b""):
+                f.write(chunk)
+
+    size = os.path.getsize(part_path)
+    if total is not None and size != total:
+        raise IncompleteDownload(f"Download of {url} stopped at {size} of {total} bytes")
+
+
+def download_resumable(url: str, dest, sha256: str = None, retries: int = 5,
+                       timeout: float = 60.0, chunk_size: int = CHUNK_SIZE) -> bool:
+    """Stream url to dest, resuming interrupted downloads and verifying the checksum
+
+    A finished dest is kept when it matches sha256 (or when no checksum is
+    given). The download goes to dest + ".part" and is renamed into place only
+    after it completes and verifies.
+
+    Returns:
+        bool: True if a download happened, False if dest was already present
+    """
+    dest = str(dest)
+    part_path = dest + ".part"
+
+    if os.path.exists(dest):
+        if sha256 is None or file_digest(dest, "sha256", CHUNK_SIZE) == sha256.lower():
+            logger.info(f"{dest} already present, skipping download")
+            return False
+        logger.info(f"{dest} does not match the expected checksum, downloading again")
+        os.remove(dest)
+
+    for attempt in range(1, retries + 1):
+        try:
+            _fetch(url, part_path, timeout, chunk_size)
+            break
+        except HTMLResponseError:
+            raise
+        except (urllib.error.URLError, ConnectionError, TimeoutError, http.client.HTTPException) as e:
+            if attempt == retries:
+                raise
+            wait = min(2 ** attempt, 30)
+            logger.info(f"Download of {url} interrupted ({e}), resuming in {wait}s [{attempt}/{retries}]")
+            time.sleep(wait)
+
+    if sha256 is not None:
+        actual = file_digest(part_path, "sha256", CHUNK_SIZE)
+        if actual != sha256.lower():
+            os.remove(part_path)
+            raise ValueError(f"Checksum mismatch for {url}: expected {sha256}, got {actual}")
+
+    os.replace(part_path, dest)
+    return True
+
+
+def _crc32(path, chunk_size: int = CHUNK_SIZE) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def _member_path(dest: str, info: zipfile.ZipInfo) -> str:
+    """Where a member lands under dest; drops '', '.' and '..' parts like ZipFile.extract does"""
+    parts = [p for p in info.filename.replace("\\", "/").split("/") if p not in ("", ".", "..")]
+    return os.path.join(dest, *parts)
+
+
+def _is_extracted(info: zipfile.ZipInfo, target: str) -> bool:
+    return (
+        os.path.isfile(target)
+        and os.path.getsize(target) == info.file_size
+        and _crc32(target) == info.CRC
+    )
+
+
+def extract_zip_parallel(zip_path, dest, max_workers: int = 8) -> dict:
+    """Extract a zip across a thread pool, skipping members already on disk with matching size and CRC
+
+    Each worker reads through its own ZipFile handle, so decompression runs in
+    parallel. Directories are created up front: ZipFile.extract creates them
+    without exist_ok, which races between workers writing into the same new directory.
+
+    Returns:
+        dict: number of members extracted and skipped
+    """
+    dest = str(dest)
+    with zipfile.ZipFile(zip_path) as zf:
+        members = [info for info in zf.infolist() if not info.is_dir()]
+        directories = {_member_path(dest, info) for info in zf.infolist() if info.is_dir()}
+    targets = [_member_path(dest, info) for info in members]
+    for directory in directories | {os.path.dirname(target) for target in targets}:
+        os.makedirs(directory, exist_ok=True)
+
+    local = threading.local()
+    handles = []
+    handles_lock = threading.Lock()
+
+    def _extract(info: zipfile.ZipInfo, target: str) -> bool:
+        if _is_extracted(info, target):
+            return False
+        handle = getattr(local, "zf", None)
+        if handle is None:
+            handle = local.zf = zipfile.ZipFile(zip_path)
+            with handles_lock:
+                handles.append(handle)
+        with handle.open(info) as source, open(target, "wb") as f:
+            shutil.copyfileobj(source, f, CHUNK_SIZE)
+        return True
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            extracted = sum(pool.map(_extract, members, targets))
+    finally:
+        for handle in handles:
+            handle.close()
+
+    return {"extracted": extracted, "skipped": len(members) - extracted}
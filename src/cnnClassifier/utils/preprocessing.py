@@ -0,0 +1,96 @@
+import io
+import os
+import threading
+import numpy as np
+from PIL import Image
+
+
+RESCALE = 1. / 255
+INTERPOLATION = "bilinear"
+DEFAULT_IMAGE_SIZE = [224, 224, 3]
+
+
+def normalize_(batch: np.ndarray) -> np.ndarray:
+    """Scale a float32 array to [0, 1] in place and return it"""
+    np.multiply(batch, np.float32(RESCALE), out=batch)
+    return batch
+
+
+class ImagePreprocessor:
+    """Single source of truth for resize + normalization in training, evaluation and serving.
+
+    Images are resized with PIL bilinear interpolation, the same resampling
+    flow_from_directory uses for interpolation="bilinear", and scaled by 1/255
+    in float32 without intermediate float64 copies.
+    """
+
+    def __init__(self, image_size=DEFAULT_IMAGE_SIZE):
+        self.height, self.width = int(image_size[0]), int(image_size[1])
+        self._buffers = threading.local()
+
+    @property
+    def target_size(self) -> tuple:
+        return (self.height, self.width)
+
+    def datagenerator_kwargs(self, validation_split: float) -> dict:
+        """ImageDataGenerator arguments that apply the shared normalization"""
+        return dict(
+            preprocessing_function=normalize_,
+            validation_split=validation_split
+        )
+
+    def dataflow_kwargs(self, batch_size: int) -> dict:
+        """flow_from_directory arguments that apply the shared resize"""
+        return dict(
+            target_size=self.target_size,
+            batch_size=batch_size,
+            interpolation=INTERPOLATION
+        )
+
+    def resize(self, source) -> np.ndarray:
+        """Decode and resize one image to a (height, width, 3) uint8 array
+
+        source can be encoded image bytes, a file-like object, an HxWx3 ndarray
+        of raw 0-255 pixels, or a path.
+        """
+        if isinstance(source, np.ndarray):
+            if source.shape == (self.height, self.width, 3):
+                return source.astype(np.uint8, copy=False)
+            img = Image.fromarray(source.astype(np.uint8, copy=False))
+        else:
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                source = io.BytesIO(source)
+            elif isinstance(source, (str, os.PathLike)) and not os.path.exists(source):
+                raise FileNotFoundError(f"Image file not found: {source}")
+            img = Image.open(source)
+            img.load()
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        if img.size != (self.width, self.height):
+            img = img.resize((self.width, self.height), Image.BILINEAR)
+        return np.asarray(img, dtype=np.uint8)
+
+    def _buffer(self, batch_size: int) -> np.ndarray:
+        buffer = getattr(self._buffers, "batch", None)
+        if buffer is None or buffer.shape[0] < batch_size:
+            buffer = np.empty((batch_size, self.height, self.width, 3), dtype=np.float32)
+            self._buffers.batch = buffer
+        return buffer[:batch_size]
+
+    def preprocess_batch(self, sources, out: np.ndarray = None) -> np.ndarray:
+        """Resize a batch of images into a float32 (N, height, width, 3) buffer normalized in place
+
+        Without `out`, a per-thread buffer is reused between calls, so the result
+        is only valid until the next call from the same thread.
+        """
+        if out is None:
+            out = self._buffer(len(sources))
+        for i, source in enumerate(sources):
+            # uint8 -> float32 cast happens directly into the buffer slot
+            out[i] = self.resize(source)
+        return normalize_(out)
+
+    def preprocess(self, source) -> np.ndarray:
+        """Resize and normalize a single image into a new (height, width, 3) float32 array"""
+        out = np.empty((1, self.height, self.width, 3), dtype=np.float32)
+        return self.preprocess_batch([source], out=out)[0]
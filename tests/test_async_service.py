@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import pytest
+from cnnClassifier.pipeline.micro_batcher import MicroBatcher
+from cnnClassifier.pipeline.async_service import AsyncPredictionService, Overloaded, BatchTooLarge
+
+
+class FakeClassifier:
+    """Predicts the length of the decoded 'image'; blocks while `gate` is clear"""
+
+    cache = None
+
+    def __init__(self):
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def decode(self, image_b64):
+        return image_b64.encode()
+
+    def cached(self, image_bytes):
+        return image_bytes, None
+
+    def load_image(self, image_bytes):
+        self.gate.wait()
+        return image_bytes
+
+    def remember(self, key, result):
+        pass
+
+    def predict_batch(self, images):
+        return [{"length": len(image)} for image in images]
+
+
+@pytest.fixture
+def service():
+    classifier = FakeClassifier()
+    service = AsyncPredictionService(classifier, MicroBatcher(classifier.predict_batch, max_wait_ms=1),
+                                     max_workers=2, max_in_flight=3, timeout_s=5)
+    yield service
+    classifier.gate.set()
+    service.close()
+
+
+def test_predicts_batch_in_order(service):
+    results = asyncio.run(service.predict_many(["a", "bb", "ccc"]))
+    assert results == [{"length": 1}, {"length": 2}, {"length": 3}]
+    assert service.in_flight == 0
+
+
+def test_batch_larger_than_limit_is_too_large_not_overloaded(service):
+    with pytest.raises(BatchTooLarge):
+        asyncio.run(service.predict_many(["a"] * 4))
+    assert service.rejected == 0
+
+
+def test_images_must_be_a_list(service):
+    with pytest.raises(TypeError):
+        asyncio.run(service.predict_many("abc"))
+
+
+def test_refuses_past_max_in_flight_until_work_finishes(service):
+    async def scenario():
+        service.classifier.gate.clear()
+        first = asyncio.ensure_future(service.predict_many(["a", "b"]))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await service.predict_many(["c", "d"])
+        service.classifier.gate.set()
+        await first
+        return await service.predict_many(["c", "d"])
+
+    assert asyncio.run(scenario()) == [{"length": 1}, {"length": 1}]
+    assert service.rejected == 2
@@ -0,0 +1,13 @@
+import pytest
+from benchmarks import bench_input_pipeline
+
+
+@pytest.mark.parametrize("data_loader", bench_input_pipeline.LOADERS)
+def test_input_pipeline_training_configs_build(tmp_path, data_loader):
+    config = bench_input_pipeline._training_config(str(tmp_path), str(tmp_path / "data"), data_loader, batch_size=4)
+    assert config.params_data_loader == data_loader
+
+
+def test_input_pipeline_cache_config_builds(tmp_path):
+    config = bench_input_pipeline._cache_config(str(tmp_path), str(tmp_path / "data"))
+    assert config.root_dir == tmp_path / "dataset_cache"
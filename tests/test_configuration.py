@@ -0,0 +1,59 @@
+import shutil
+import pytest
+import yaml
+from pathlib import Path
+from cnnClassifier.config.configuration import ConfigurationManager, clear_config_cache
+
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """A copy of the repo's config and params in an empty project directory"""
+    (tmp_path / "config").mkdir()
+    shutil.copy(REPO_DIR / "config" / "config.yaml", tmp_path / "config" / "config.yaml")
+    shutil.copy(REPO_DIR / "params.yaml", tmp_path / "params.yaml")
+    monkeypatch.chdir(tmp_path)
+
+    def manager(create_dirs: bool = True, **params):
+        values = yaml.safe_load((tmp_path / "params.yaml").read_text())
+        values.update(params)
+        (tmp_path / "params.yaml").write_text(yaml.safe_dump(values))
+        # A rewrite can keep the same mtime, which the YAML cache is keyed on
+        clear_config_cache()
+        return ConfigurationManager(tmp_path / "config" / "config.yaml", tmp_path / "params.yaml", create_dirs)
+
+    return manager
+
+
+def test_training_config_rejects_eager_with_xla(project):
+    with pytest.raises(ValueError, match="RUN_EAGERLY and JIT_COMPILE"):
+        project(RUN_EAGERLY=True, JIT_COMPILE=True).get_training_config()
+
+
+def test_training_config_accepts_each_mode(project):
+    for run_eagerly, jit_compile in ((False, False), (True, False), (False, True)):
+        config = project(RUN_EAGERLY=run_eagerly, JIT_COMPILE=jit_compile).get_training_config()
+        assert (config.params_run_eagerly, config.params_jit_compile) == (run_eagerly, jit_compile)
+
+
+def test_read_only_manager_creates_no_directories(project, tmp_path):
+    manager = project(create_dirs=False)
+    manager.get_training_config()
+    manager.get_model_export_config()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["config", "params.yaml"]
+
+    # Entities cached for the read-only manager do not stand in for ones that create their directories
+    training = ConfigurationManager(tmp_path / "config" / "config.yaml", tmp_path / "params.yaml").get_training_config()
+    assert training.root_dir.is_dir()
+
+
+def test_cpu_profile_thread_counts_are_validated(project):
+    profiles = yaml.safe_load((REPO_DIR / "params.yaml").read_text())["CPU_PROFILES"]
+    profiles["tuned"]["inter_op_threads"] = "two"
+    with pytest.raises(ValueError, match="inter_op_threads"):
+        project(CPU_PROFILE="tuned", CPU_PROFILES=profiles).get_cpu_profile_config()
+
+    profiles["tuned"]["inter_op_threads"] = "physical"
+    assert project(CPU_PROFILE="tuned", CPU_PROFILES=profiles).get_cpu_profile_config().inter_op_threads == "physical"
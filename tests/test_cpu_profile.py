@@ -0,0 +1,15 @@
+import os
+import pytest
+from cnnClassifier.utils import cpu_profile
+
+CPUINFO = "".join(f"processor\t: {i}\nphysical id\t: 0\ncore id\t\t: {i}\n\n" for i in range(8))
+
+
+@pytest.mark.skipif(not hasattr(os, "sched_getaffinity"), reason="no CPU affinity on this platform")
+def test_physical_cores_is_capped_by_cpu_affinity(monkeypatch):
+    monkeypatch.setattr(cpu_profile, "_cpuinfo", lambda: CPUINFO)
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: {0, 1})
+    assert cpu_profile.physical_cores() == 2
+
+    monkeypatch.setattr(os, "sched_getaffinity", lambda pid: set(range(16)))
+    assert cpu_profile.physical_cores() == 8
@@ -0,0 +1,66 @@
+import zipfile
+import numpy as np
+import pytest
+from PIL import Image
+from cnnClassifier.components.data_pipeline import TFDataLoader, ZipDataLoader
+from cnnClassifier.pipeline.prediction import PredictionPipeline
+
+
+class RecordingRegistry:
+    """Stands in for the model registry; keeps the batch the model was asked to predict"""
+
+    version = 1
+
+    def __init__(self):
+        self.batches = []
+
+    def get_model(self):
+        return self
+
+    def predict(self, batch, verbose=0):
+        self.batches.append(batch.copy())
+        return np.full((len(batch), 2), 0.5, dtype=np.float32)
+
+
+@pytest.fixture
+def jpeg_dir(tmp_path):
+    rng = np.random.default_rng(0)
+    for class_name in ("Adenocarcinoma", "Normal"):
+        (tmp_path / class_name).mkdir()
+        pixels = rng.integers(0, 256, size=(311, 257, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(tmp_path / class_name / "0.jpg", quality=90)
+    return tmp_path
+
+
+def _served_pixels(image_bytes: bytes) -> np.ndarray:
+    registry = RecordingRegistry()
+    pipeline = PredictionPipeline(registry=registry)
+    pipeline.predict_batch([pipeline.load_image(image_bytes)])
+    return registry.batches[0][0]
+
+
+def test_tf_data_loader_sees_the_pixels_prediction_sees(jpeg_dir):
+    loader = TFDataLoader(jpeg_dir, image_size=[224, 224, 3], batch_size=2, validation_split=0.0)
+    dataset, samples = loader.dataset("training", shuffle=False)
+    images, labels = next(iter(dataset))
+    assert samples == 2 and images.shape == (2, 224, 224, 3)
+
+    for image, class_name in zip(images.numpy(), loader.class_names):
+        served = _served_pixels((jpeg_dir / class_name / "0.jpg").read_bytes())
+        np.testing.assert_array_equal(image, served)
+
+
+def test_zip_loader_matches_tf_data_and_closes_the_archive(jpeg_dir, tmp_path):
+    zip_path = tmp_path / "data.zip"
+    with zipfile.ZipFile(zip_path, "w") as zf:
+        for path in jpeg_dir.rglob("*.jpg"):
+            zf.write(path, f"images/{path.relative_to(jpeg_dir).as_posix()}")
+    kwargs = dict(image_size=[224, 224, 3], batch_size=2, validation_split=0.0)
+
+    with TFDataLoader(jpeg_dir, **kwargs) as loader:
+        expected = next(iter(loader.dataset("training", shuffle=False)[0]))[0].numpy()
+    with ZipDataLoader(zip_path, root="images", **kwargs) as loader:
+        images = next(iter(loader.dataset("training", shuffle=False)[0]))[0].numpy()
+        archive_file = loader.archive._file
+    np.testing.assert_array_equal(images, expected)
+    assert archive_file.closed
@@ -0,0 +1,54 @@
+import os
+import json
+import pytest
+from cnnClassifier.entity.config_entity import DistributedConfig
+from cnnClassifier.utils.cpu_profile import _threads
+from cnnClassifier.utils.distributed import launch_local_workers, local_cluster, workers_on_this_host
+
+
+WORKER = """
+import os, sys, time
+print("THREADS", os.environ["TF_NUM_INTRAOP_THREADS"], flush=True)
+time.sleep(float(os.environ.get("WORKER_SLEEP", "0")))
+"""
+
+
+@pytest.fixture
+def worker_module(tmp_path, monkeypatch):
+    (tmp_path / "fake_worker.py").write_text(WORKER)
+    monkeypatch.setenv("PYTHONPATH", str(tmp_path))
+    monkeypatch.delenv("TF_CONFIG", raising=False)
+    return "fake_worker"
+
+
+def test_launcher_overrides_inherited_thread_count(tmp_path, worker_module, monkeypatch):
+    monkeypatch.setenv("TF_NUM_INTRAOP_THREADS", "999")
+    config = DistributedConfig(strategy="multi_worker", local_workers=2, port=0, timeout_s=60)
+    launch_local_workers(config, tmp_path / "logs", module=worker_module)
+
+    expected = str(max(1, (os.cpu_count() or 1) // 2))
+    for i in range(2):
+        assert (tmp_path / "logs" / f"worker_{i}.log").read_text().split() == ["THREADS", expected]
+
+
+def test_launcher_stops_workers_after_timeout(tmp_path, worker_module, monkeypatch):
+    monkeypatch.setenv("WORKER_SLEEP", "30")
+    config = DistributedConfig(strategy="multi_worker", local_workers=2, port=0, timeout_s=0.5)
+    with pytest.raises(TimeoutError):
+        launch_local_workers(config, tmp_path / "logs", module=worker_module)
+
+
+def test_thread_counts_are_split_between_workers_on_one_host(monkeypatch):
+    monkeypatch.delenv("TF_CONFIG", raising=False)
+    assert workers_on_this_host() == 1
+    assert _threads(8) == 8
+
+    monkeypatch.setenv("TF_CONFIG", json.dumps(local_cluster(4, port=20000)[1]))
+    assert workers_on_this_host() == 4
+    assert _threads(8) == 2
+    assert _threads(0) == 0
+
+    remote = {"cluster": {"worker": ["host-a:2222", "host-b:2222"]}, "task": {"type": "worker", "index": 1}}
+    monkeypatch.setenv("TF_CONFIG", json.dumps(remote))
+    assert workers_on_this_host() == 1
+    assert _threads(8) == 8
@@ -0,0 +1,168 @@
+import os
+import re
+import sys
+import hashlib
+import zipfile
+import threading
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from cnnClassifier.utils import download
+from cnnClassifier.components import data_ingestion
+from cnnClassifier.entity.config_entity import DataIngestionConfig
+from cnnClassifier.utils.download import download_resumable, extract_zip_parallel, IncompleteDownload
+
+
+DATA = os.urandom(300_000)
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Serves DATA with Range support; `truncate` responses stop halfway, `ignore_range` always answers 200"""
+
+    truncate = 0
+    ignore_range = False
+    ranges = []
+
+    def do_GET(self):
+        match = re.match(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        start = int(match.group(1)) if match and not self.ignore_range else 0
+        type(self).ranges.append(start if match else None)
+        if start >= len(DATA):
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{len(DATA)}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = DATA[start:]
+        self.send_response(206 if match and not self.ignore_range else 200)
+        if match and not self.ignore_range:
+            self.send_header("Content-Range", f"bytes {start}-{len(DATA) - 1}/{len(DATA)}")
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if type(self).truncate:
+            type(self).truncate -= 1
+            body = body[:len(body) // 2]
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(download.time, "sleep", lambda seconds: None)
+    RangeHandler.truncate, RangeHandler.ignore_range, RangeHandler.ranges = 0, False, []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/data.zip"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_early_eof_is_resumed(server, tmp_path):
+    RangeHandler.truncate = 1
+    dest = tmp_path / "data.zip"
+
+    assert download_resumable(server, dest)
+    assert dest.read_bytes() == DATA
+    assert RangeHandler.ranges == [None, len(DATA) // 2]
+
+
+def test_early_eof_on_every_attempt_is_not_accepted(server, tmp_path):
+    RangeHandler.truncate = 10
+    dest = tmp_path / "data.zip"
+
+    with pytest.raises(IncompleteDownload):
+        download_resumable(server, dest, retries=2)
+    assert not dest.exists()
+
+
+def test_server_ignoring_range_restarts(server, tmp_path):
+    RangeHandler.ignore_range = True
+    dest = tmp_path / "data.zip"
+    (tmp_path / "data.zip.part").write_bytes(b"stale bytes")
+
+    assert download_resumable(server, dest)
+    assert dest.read_bytes() == DATA
+
+
+def test_416_with_complete_part(server, tmp_path):
+    dest = tmp_path / "data.zip"
+    (tmp_path / "data.zip.part").write_bytes(DATA)
+
+    assert download_resumable(server, dest)
+    assert dest.read_bytes() == DATA
+    assert RangeHandler.ranges == [len(DATA)]
+
+
+def test_416_with_oversized_part_restarts(server, tmp_path):
+    dest = tmp_path / "data.zip"
+    (tmp_path / "data.zip.part").write_bytes(DATA + b"trailing garbage")
+
+    assert download_resumable(server, dest)
+    assert dest.read_bytes() == DATA
+    assert RangeHandler.ranges == [len(DATA) + 16, None]
+
+
+@pytest.fixture
+def archive(tmp_path):
+    path = tmp_path / "data.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("data/empty/", "")
+        for directory in ("Normal", "Adenocarcinoma", "nested/deeper"):
+            for i in range(20):
+                zf.writestr(f"data/{directory}/{i}.jpg", os.urandom(1000))
+    return path
+
+
+def test_extraction_into_new_directories(archive, tmp_path):
+    dest = tmp_path / "out"
+    for _ in range(10):
+        assert extract_zip_parallel(archive, dest, max_workers=8) == {"extracted": 60, "skipped": 0}
+        with zipfile.ZipFile(archive) as zf:
+            for name in zf.namelist():
+                if not name.endswith("/"):
+                    assert (dest / name).read_bytes() == zf.read(name)
+        assert (dest / "data" / "empty").is_dir()
+        for path in sorted(dest.rglob("*"), reverse=True):
+            path.rmdir() if path.is_dir() else path.unlink()
+
+
+def test_second_extraction_skips_members_with_matching_crc(archive, tmp_path):
+    dest = tmp_path / "out"
+    extract_zip_parallel(archive, dest)
+    changed = dest / "data" / "Normal" / "3.jpg"
+    original = changed.read_bytes()
+    changed.write_bytes(bytes(len(original)))  # same size, different CRC
+    (dest / "data" / "nested" / "deeper" / "7.jpg").unlink()
+
+    assert extract_zip_parallel(archive, dest) == {"extracted": 2, "skipped": 58}
+    assert changed.read_bytes() == original
+
+
+@pytest.mark.parametrize("served, ok", [(DATA, True), (DATA[:1000], False)])
+def test_gdown_fallback_is_checksummed(tmp_path, monkeypatch, served, ok):
+    def refused(*args, **kwargs):
+        raise download.HTMLResponseError("interstitial page")
+
+    def fake_gdown(url, output, resume):
+        with open(output, "wb") as f:
+            f.write(served)
+
+    monkeypatch.setattr(data_ingestion, "download_resumable", refused)
+    monkeypatch.setitem(sys.modules, "gdown", SimpleNamespace(download=fake_gdown))
+    dest = tmp_path / "data.zip"
+    config = DataIngestionConfig(root_dir=tmp_path, source_URL="https://drive.google.com/file/d/abc/view",
+                                 local_data_file=dest, unzip_dir=tmp_path, extract_workers=1,
+                                 source_sha256=hashlib.sha256(DATA).hexdigest(), params_data_loader="keras")
+    ingestion = data_ingestion.DataIngestion(config)
+    if ok:
+        ingestion.download_file()
+        assert dest.read_bytes() == DATA
+    else:
+        with pytest.raises(ValueError, match="Checksum mismatch"):
+            ingestion.download_file()
+        assert not dest.exists()
@@ -0,0 +1,46 @@
+from cnnClassifier.utils.metrics import MetricsRegistry
+
+
+def test_counter_renders_one_line_per_label_set():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests served", ["path"])
+    requests.inc(path="/predict")
+    requests.inc(2, path="/predict")
+    requests.inc(path='/a"b')
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests served",
+        "# TYPE requests_total counter",
+        'requests_total{path="/a\\"b"} 1',
+        'requests_total{path="/predict"} 3',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.5, 0.1, 1.0))
+    for value in (0.05, 0.1, 0.3, 2.0):
+        latency.observe(value)
+    lines = registry.render().splitlines()
+    assert lines[2:] == [
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="0.5"} 3',
+        'latency_seconds_bucket{le="1.0"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 2.45",
+        "latency_seconds_count 4",
+    ]
+
+
+def test_histogram_time_observes_with_labels():
+    registry = MetricsRegistry()
+    latency = registry.histogram("stage_seconds", "Stage time", ["stage"], buckets=(10.0,))
+    with latency.time(stage="decode"):
+        pass
+    assert 'stage_seconds_bucket{stage="decode",le="10.0"} 1' in registry.render()
+
+
+def test_collectors_are_appended_after_metrics():
+    registry = MetricsRegistry()
+    registry.counter("a_total", "A").inc()
+    registry.add_collector(lambda: ["cache_hits_total 7"])
+    assert registry.render().endswith("a_total 1\ncache_hits_total 7\n")
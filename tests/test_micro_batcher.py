@@ -0,0 +1,90 @@
+import time
+import threading
+import pytest
+from cnnClassifier.pipeline.micro_batcher import MicroBatcher
+
+
+class RecordingPredictor:
+    """Doubles each item and records the batch sizes it was called with"""
+
+    def __init__(self):
+        self.batches = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, items):
+        self.gate.wait()
+        self.batches.append(len(items))
+        return [item * 2 for item in items]
+
+
+@pytest.fixture
+def predictor():
+    return RecordingPredictor()
+
+
+def test_concurrent_items_share_one_batch(predictor):
+    batcher = MicroBatcher(predictor, max_batch_size=4, max_wait_ms=500)
+    try:
+        futures = [batcher.submit(i) for i in range(4)]
+        assert [f.result(timeout=5) for f in futures] == [0, 2, 4, 6]
+        assert predictor.batches == [4]
+    finally:
+        batcher.close()
+
+
+def test_batches_are_capped_at_max_batch_size(predictor):
+    batcher = MicroBatcher(predictor, max_batch_size=3, max_wait_ms=500)
+    try:
+        # Hold the worker on a first item so the next seven queue up behind it
+        predictor.gate.clear()
+        first = batcher.submit(0)
+        time.sleep(0.05)
+        futures = [batcher.submit(i) for i in range(1, 8)]
+        predictor.gate.set()
+        assert [f.result(timeout=5) for f in [first] + futures] == [i * 2 for i in range(8)]
+        assert max(predictor.batches) <= 3 and sum(predictor.batches) == 8
+    finally:
+        batcher.close()
+
+
+def test_lone_item_is_flushed_after_max_wait(predictor):
+    batcher = MicroBatcher(predictor, max_batch_size=16, max_wait_ms=50)
+    try:
+        start = time.monotonic()
+        assert batcher.predict(21, timeout=5) == 42
+        assert 0.04 <= time.monotonic() - start < 2
+        assert predictor.batches == [1]
+    finally:
+        batcher.close()
+
+
+def test_failure_reaches_every_item_of_the_batch():
+    def failing(items):
+        raise ValueError("bad batch")
+
+    batcher = MicroBatcher(failing, max_batch_size=2, max_wait_ms=200)
+    try:
+        futures = [batcher.submit(i) for i in range(2)]
+        for future in futures:
+            with pytest.raises(ValueError, match="bad batch"):
+                future.result(timeout=5)
+    finally:
+        batcher.close()
+
+
+def test_wrong_number_of_results_is_an_error():
+    batcher = MicroBatcher(lambda items: items[:-1], max_batch_size=2, max_wait_ms=200)
+    try:
+        futures = [batcher.submit(i) for i in range(2)]
+        with pytest.raises(RuntimeError, match="1 results for 2 items"):
+            futures[0].result(timeout=5)
+    finally:
+        batcher.close()
+
+
+def test_submit_after_close_is_refused(predictor):
+    batcher = MicroBatcher(predictor)
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(1)
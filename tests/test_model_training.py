@@ -0,0 +1,40 @@
+import json
+import pytest
+import tensorflow as tf
+from cnnClassifier.components.model_training import BestModelCallback
+
+
+@pytest.fixture
+def model():
+    return tf.keras.Sequential([tf.keras.Input((2,)), tf.keras.layers.Dense(2)])
+
+
+def _callback(tmp_path, model, resume=False, patience=3):
+    callback = BestModelCallback(tmp_path / "best.json", tmp_path / "best", patience=patience, resume=resume)
+    callback.set_model(model)
+    return callback
+
+
+def test_tracks_best_epoch_and_patience(tmp_path, model):
+    callback = _callback(tmp_path, model, patience=2)
+    for epoch, val_loss in enumerate([1.0, 0.5, 0.7, 0.6]):
+        callback.on_epoch_end(epoch, {"val_loss": val_loss})
+    assert callback.state["best_epoch"] == 2 and callback.state["wait"] == 2
+    assert model.stop_training
+    assert [p.name for p in (tmp_path / "best").iterdir()] == ["epoch_2.weights.h5"]
+
+
+def test_epoch_repeated_after_a_crash_is_counted_once(tmp_path, model):
+    callback = _callback(tmp_path, model)
+    callback.on_epoch_end(0, {"val_loss": 1.0})
+    callback.on_epoch_end(1, {"val_loss": 0.5})
+    # The run dies after best.json has epoch 2 but before its backup, so the resumed run repeats epoch 2
+    resumed = _callback(tmp_path, model, resume=True)
+    resumed.on_epoch_end(1, {"val_loss": 1.5})
+
+    state = json.loads((tmp_path / "best.json").read_text())
+    assert (state["epoch"], state["best_epoch"], state["wait"]) == (2, 1, 1)
+    assert resumed.best_weights_path.exists()
+
+    resumed.on_epoch_end(2, {"val_loss": 1.2})
+    assert resumed.state["wait"] == 2
@@ -0,0 +1,62 @@
+import pytest
+from types import SimpleNamespace
+from cnnClassifier.pipeline import result_cache
+from cnnClassifier.pipeline.result_cache import ResultCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(result_cache, "time", SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResultCache(max_entries=2, ttl_s=60)
+    cache.put("a", 1, {"label": "a"})
+    cache.put("b", 1, {"label": "b"})
+    assert cache.get("a", 1) == {"label": "a"}  # now "b" is the least recently used
+    cache.put("c", 1, {"label": "c"})
+
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == {"label": "a"} and cache.get("c", 1) == {"label": "c"}
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResultCache(max_entries=8, ttl_s=10)
+    cache.put("a", 1, {"label": "a"})
+    clock.now += 9.9
+    assert cache.get("a", 1) == {"label": "a"}
+    clock.now += 0.2
+    assert cache.get("a", 1) is None
+    stats = cache.stats()
+    assert (stats["entries"], stats["evictions"], stats["hits"], stats["misses"]) == (0, 1, 1, 1)
+
+
+def test_new_model_version_clears_and_old_version_is_ignored(clock):
+    cache = ResultCache()
+    cache.put("a", 1, {"label": "old"})
+    assert cache.get("a", 2) is None
+    assert cache.stats()["entries"] == 0
+
+    # A result from the replaced model arriving late is dropped
+    cache.put("b", 1, {"label": "stale"})
+    assert cache.get("b", 1) is None and cache.stats()["entries"] == 0
+
+
+def test_returned_results_are_copies(clock):
+    cache = ResultCache()
+    result = {"label": "a"}
+    cache.put("a", 1, result)
+    result["label"] = "changed"
+    cache.get("a", 1)["label"] = "changed again"
+    assert cache.get("a", 1) == {"label": "a"}
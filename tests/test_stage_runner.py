@@ -0,0 +1,143 @@
+import os
+import ast
+import shutil
+import pytest
+from pathlib import Path
+from dataclasses import dataclass
+from cnnClassifier.config.configuration import ConfigurationManager, clear_config_cache
+from cnnClassifier.pipeline.stage_runner import Stage, StageRunner
+import main
+
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+
+
+@dataclass(frozen=True)
+class FakeConfig:
+    root_dir: str
+    size: int = 1
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "input.txt").write_text("v1")
+    (tmp_path / "data").mkdir()
+    (tmp_path / "data" / "a.jpg").write_bytes(b"a")
+    return tmp_path
+
+
+def _stage(runs: list, config=FakeConfig("out"), params=("EPOCHS",)):
+    class Pipeline:
+        def main(self):
+            runs.append(1)
+            os.makedirs("out", exist_ok=True)
+            with open("out/model.h5", "w") as f:
+                f.write("model")
+
+    return Stage(name="Training", pipeline=Pipeline, config=config, params=list(params),
+                 deps=["input.txt", "data"], outs=["out/model.h5"])
+
+
+def _run(runs, all_params=None, force=False, **stage_kwargs) -> bool:
+    runner = StageRunner(all_params=all_params or {"EPOCHS": 1}, manifest_path="manifest.json", force=force)
+    return runner.run(_stage(runs, **stage_kwargs))
+
+
+def test_unchanged_stage_is_skipped(project):
+    runs = []
+    assert _run(runs) is True
+    assert _run(runs) is False
+    assert len(runs) == 1
+
+
+@pytest.mark.parametrize("change", ["dep_file", "file_in_dep_dir", "new_file_in_dep_dir", "param", "config",
+                                    "missing_out"])
+def test_stage_reruns_when_an_input_changes(project, change):
+    runs = []
+    _run(runs)
+    kwargs = {}
+    if change == "dep_file":
+        (project / "input.txt").write_text("v2, a different size")
+    elif change == "file_in_dep_dir":
+        (project / "data" / "a.jpg").write_bytes(b"aa")
+    elif change == "new_file_in_dep_dir":
+        (project / "data" / "b.jpg").write_bytes(b"b")
+    elif change == "param":
+        kwargs["all_params"] = {"EPOCHS": 2}
+    elif change == "config":
+        kwargs["config"] = FakeConfig("out", size=2)
+    elif change == "missing_out":
+        (project / "out" / "model.h5").unlink()
+    assert _run(runs, **kwargs) is True
+    assert len(runs) == 2
+
+
+def test_params_the_stage_does_not_read_are_ignored(project):
+    runs = []
+    _run(runs, all_params={"EPOCHS": 1, "BATCH_SIZE": 16})
+    assert _run(runs, all_params={"EPOCHS": 1, "BATCH_SIZE": 32}) is False
+
+
+def test_force_runs_an_unchanged_stage(project):
+    runs = []
+    _run(runs)
+    assert _run(runs, force=True) is True
+    assert len(runs) == 2
+
+
+def test_interrupted_stage_runs_again(project):
+    class Failing:
+        def main(self):
+            raise RuntimeError("killed")
+
+    runs = []
+    _run(runs)
+    runner = StageRunner(all_params={"EPOCHS": 2}, manifest_path="manifest.json")
+    failing = Stage(name="Training", pipeline=Failing, config=FakeConfig("out"), params=["EPOCHS"],
+                    deps=["input.txt", "data"], outs=["out/model.h5"])
+    with pytest.raises(RuntimeError):
+        runner.run(failing)
+    # The old output is still there, but the manifest no longer vouches for it
+    assert _run(runs) is True
+
+
+def _module_file(module: str):
+    """Source file of a cnnClassifier module, None for names that are not modules (e.g. imported classes)"""
+    path = REPO_DIR / "src" / Path(*module.split("."))
+    for candidate in (path.with_suffix(".py"), path / "__init__.py"):
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def _imported_code(module: str) -> set:
+    """Files of every cnnClassifier module `module` imports, directly or not, as paths relative to the repo"""
+    seen, todo = set(), [module]
+    while todo:
+        name = todo.pop()
+        path = _module_file(name)
+        if name in seen or path is None:
+            continue
+        seen.add(name)
+        for node in ast.walk(ast.parse(path.read_text())):
+            if isinstance(node, ast.ImportFrom) and node.module and node.module.startswith("cnnClassifier"):
+                todo.append(node.module)
+                todo.extend(f"{node.module}.{alias.name}" for alias in node.names)
+    files = {_module_file(name) for name in seen}
+    return {path.relative_to(REPO_DIR).as_posix() for path in files if path.name != "__init__.py"}
+
+
+def test_every_stage_lists_the_code_it_imports(tmp_path, monkeypatch):
+    (tmp_path / "config").mkdir()
+    shutil.copy(REPO_DIR / "config" / "config.yaml", tmp_path / "config" / "config.yaml")
+    shutil.copy(REPO_DIR / "params.yaml", tmp_path / "params.yaml")
+    monkeypatch.chdir(tmp_path)
+    clear_config_cache()
+
+    for stage in main.pipeline_stages(ConfigurationManager(create_dirs=False)):
+        # Configuration code only reaches a stage through its config, which is fingerprinted
+        imported = {path for path in _imported_code(stage.pipeline.split(":")[0])
+                    if not path.startswith(("src/cnnClassifier/config/", "src/cnnClassifier/entity/"))}
+        missing = imported - {str(dep) for dep in stage.deps}
+        assert not missing, f"{stage.name} does not list {sorted(missing)}"
@@ -0,0 +1,91 @@
+import time
+import threading
+import numpy as np
+from cnnClassifier.components.streaming_evaluation import StreamingMetrics, prefetch_batches
+
+
+class SlowSequence:
+    """Indexable batch source where each batch takes `delay` seconds to load"""
+
+    def __init__(self, length: int, delay: float):
+        self.length, self.delay = length, delay
+        self.threads = set()
+        self.loading = self.max_loading = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        with self.lock:
+            self.threads.add(threading.get_ident())
+            self.loading += 1
+            self.max_loading = max(self.max_loading, self.loading)
+        time.sleep(self.delay)
+        with self.lock:
+            self.loading -= 1
+        return index
+
+
+def test_prefetch_keeps_order_and_loads_ahead_on_worker_threads():
+    sequence = SlowSequence(length=20, delay=0.05)
+    assert list(prefetch_batches(sequence, workers=4)) == list(range(20))
+    assert sequence.max_loading > 1
+    assert threading.get_ident() not in sequence.threads
+
+
+def test_f1_is_zero_when_a_class_is_never_predicted_right():
+    metrics = StreamingMetrics(["a", "b"])
+    # Every image of class a is predicted b, and the only b prediction of a b image is right
+    metrics.update(np.array([0, 0, 1]), np.array([[0.2, 0.8], [0.1, 0.9], [0.3, 0.7]]))
+    per_class = metrics.result()["per_class"]
+    assert per_class["a"]["precision"] is None and per_class["a"]["f1"] is None
+    assert per_class["a"]["recall"] == 0.0
+
+    metrics = StreamingMetrics(["a", "b"])
+    metrics.update(np.array([0, 1]), np.array([[0.2, 0.8], [0.9, 0.1]]))
+    per_class = metrics.result()["per_class"]
+    assert per_class["a"] == {**per_class["a"], "precision": 0.0, "recall": 0.0, "f1": 0.0}
+
+
+def test_confusion_matrix_and_accuracy_of_a_known_batch():
+    metrics = StreamingMetrics(["a", "b", "c"])
+    labels = np.array([0, 0, 1, 2, 2])
+    probabilities = np.array([[0.7, 0.2, 0.1], [0.1, 0.8, 0.1], [0.2, 0.6, 0.2], [0.1, 0.1, 0.8], [0.5, 0.3, 0.2]])
+    # Split across two updates, given once as indices and once one-hot
+    metrics.update(labels[:2], probabilities[:2])
+    metrics.update(np.eye(3)[labels[2:]], probabilities[2:])
+    result = metrics.result()
+    assert result["confusion_matrix"] == [[1, 1, 0], [0, 1, 0], [1, 0, 1]]
+    assert result["accuracy"] == 3 / 5 and result["samples"] == 5
+    assert result["per_class"]["b"] == {**result["per_class"]["b"], "precision": 0.5, "recall": 1.0, "support": 1}
+    expected_loss = -np.log([0.7, 0.1, 0.6, 0.8, 0.2]).mean()
+    assert np.isclose(result["loss"], expected_loss)
+
+
+def _pairwise_auc(scores, positive):
+    """Fraction of (positive, negative) pairs ranked correctly, ties counted as half"""
+    pos, neg = scores[positive], scores[~positive]
+    diff = pos[:, None] - neg[None, :]
+    return float(((diff > 0).sum() + 0.5 * (diff == 0).sum()) / diff.size)
+
+
+def test_roc_auc_matches_pairwise_auc():
+    rng = np.random.default_rng(0)
+    labels = rng.integers(0, 3, size=400)
+    logits = rng.normal(size=(400, 3)) + 1.5 * np.eye(3)[labels]
+    probabilities = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+
+    metrics = StreamingMetrics(["a", "b", "c"], roc_bins=100_000)
+    for start in range(0, 400, 64):
+        metrics.update(labels[start:start + 64], probabilities[start:start + 64])
+    for c in range(3):
+        expected = _pairwise_auc(probabilities[:, c], labels == c)
+        assert abs(metrics.roc_auc(c) - expected) < 1e-3
+
+
+def test_roc_auc_is_none_without_positives():
+    metrics = StreamingMetrics(["a", "b"])
+    metrics.update(np.array([0, 0]), np.array([[0.9, 0.1], [0.6, 0.4]]))
+    assert metrics.roc_auc(1) is None and metrics.roc_auc(0) is None
+    assert metrics.result()["macro_roc_auc"] is None
@@ -0,0 +1,84 @@
+import os
+import sys
+import json
+import time
+import signal
+import subprocess
+from pathlib import Path
+from cnnClassifier.pipeline.training_jobs import TrainingJobManager
+
+
+SRC_DIR = str(Path(__file__).resolve().parents[1] / "src")
+
+# A server process that starts a long job and keeps running until killed
+OWNER = """
+import sys, time
+from cnnClassifier.pipeline.training_jobs import TrainingJobManager
+manager = TrainingJobManager(command=[sys.executable, "-c", "import time; time.sleep(60)"], state_dir=sys.argv[1])
+job, _ = manager.submit()
+print("JOB", job.job_id, flush=True)
+time.sleep(60)
+"""
+
+
+def _wait_for(condition, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.05)
+
+
+def _start_owner(state_dir):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SRC_DIR, os.environ.get("PYTHONPATH")])))
+    owner = subprocess.Popen([sys.executable, "-c", OWNER, str(state_dir)], env=env,
+                             stdout=subprocess.PIPE, text=True, cwd=state_dir)
+    for line in owner.stdout:
+        if line.startswith("JOB "):
+            return owner, line.split()[1]
+    raise RuntimeError("owner process exited without starting a job")
+
+
+def test_job_of_live_process_is_shared(tmp_path):
+    owner, job_id = _start_owner(tmp_path)
+    try:
+        manager = TrainingJobManager(command=[sys.executable, "-c", "pass"], state_dir=tmp_path)
+        _wait_for(lambda: manager.get(job_id)["status"] == "running")
+        job, created = manager.submit()
+        assert not created and job.job_id == job_id
+    finally:
+        owner.kill()
+        owner.wait()
+        if _child_pid(tmp_path):
+            os.kill(_child_pid(tmp_path), signal.SIGKILL)
+
+
+def _child_pid(state_dir):
+    active = json.loads((state_dir / "active").read_text())
+    return active.get("child_pid")
+
+
+def test_job_outlives_its_server_until_the_pipeline_exits(tmp_path):
+    owner, job_id = _start_owner(tmp_path)
+    manager = TrainingJobManager(command=[sys.executable, "-c", "print('done')"], state_dir=tmp_path)
+    _wait_for(lambda: manager.get(job_id)["status"] == "running" and _child_pid(tmp_path))
+    child_pid = _child_pid(tmp_path)
+    owner.send_signal(signal.SIGKILL)
+    owner.wait()
+
+    try:
+        # The orphaned pipeline still runs and still holds the run lock
+        assert manager.get(job_id)["status"] == "running"
+        job, created = manager.submit()
+        assert not created and job.job_id == job_id
+    finally:
+        os.kill(child_pid, signal.SIGKILL)
+    _wait_for(lambda: manager.get(job_id)["status"] == "failed")
+
+    job, created = manager.submit()
+    assert created and job.job_id != job_id
+    abandoned = json.loads((tmp_path / f"{job_id}.json").read_text())
+    assert abandoned["status"] == "failed" and abandoned["finished_at"] is not None
+
+    _wait_for(lambda: manager.get(job.job_id)["status"] == "succeeded")
+    # The status is saved just before the marker is cleared
+    _wait_for(lambda: not (tmp_path / "active").exists())
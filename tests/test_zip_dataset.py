@@ -0,0 +1,45 @@
+import zipfile
+import pytest
+from cnnClassifier.components.zip_dataset import ZipImageDataset
+
+
+@pytest.fixture
+def zip_path(tmp_path):
+    path = tmp_path / "data.zip"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for i in range(4):
+            archive.writestr(f"images/Normal/{i}.jpg", f"normal {i}")
+        for i in range(2):
+            archive.writestr(f"images/Adenocarcinoma/{i}.PNG", f"adeno {i}")
+        archive.writestr("images/readme.jpg", "not in a class directory")
+        archive.writestr("images/Normal/notes.txt", "not an image")
+        archive.writestr("other/Extra/0.jpg", "outside the root")
+    return path
+
+
+def test_classes_are_sorted_directories_under_root(zip_path):
+    dataset = ZipImageDataset(zip_path, root="images/")
+    try:
+        assert dataset.class_names == ["Adenocarcinoma", "Normal"]
+        assert dataset.class_members[1] == [f"images/Normal/{i}.jpg" for i in range(4)]
+        assert dataset.read("images/Normal/2.jpg") == b"normal 2"
+    finally:
+        dataset.close()
+
+
+def test_first_fraction_of_each_class_is_validation(zip_path):
+    dataset = ZipImageDataset(zip_path, root="images")
+    try:
+        names, labels = dataset.list_members(0.5, "validation")
+        assert names == ["images/Adenocarcinoma/0.PNG", "images/Normal/0.jpg", "images/Normal/1.jpg"]
+        assert labels == [0, 1, 1]
+        names, labels = dataset.list_members(0.5, "training")
+        assert names == ["images/Adenocarcinoma/1.PNG", "images/Normal/2.jpg", "images/Normal/3.jpg"]
+        assert labels == [0, 1, 1]
+    finally:
+        dataset.close()
+
+
+def test_root_without_class_directories_is_an_error(zip_path):
+    with pytest.raises(ValueError, match="No class directories"):
+        ZipImageDataset(zip_path, root="missing")